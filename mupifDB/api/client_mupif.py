@@ -7,7 +7,7 @@ from .. import models
 from .client_util import *
 from rich import print_json
 from rich.pretty import pprint
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Literal
 
 thisDir = os.path.dirname(os.path.abspath(__file__))
 
@@ -119,6 +119,9 @@ pydantic.validate_call(validate_return=True)
 def getWorkflowRecord(wid, version: int) -> models.Workflow_Model:
     return models.Workflow_Model.model_validate(rGet(f"{API_PREFIX}workflows_by_wid/{wid}/version/{version}", headers=getRequestHeaders())['entity'])
 
+def updateWorkflow(wf: models.Workflow_Model) -> models.Workflow_Model:
+    return models.Workflow_Model.model_validate(rPatch(f"{API_PREFIX}workflows", data=wf.model_dump_json(), headers=getRequestHeaders()))
+
 def postWorkflowFiles(usecaseid, path_workflow, paths_additional):
     files = {}
     if path_workflow is None or not os.path.exists(path_workflow):
@@ -170,7 +173,7 @@ def postWorkflowFiles(usecaseid, path_workflow, paths_additional):
 
 pydantic.validate_call(validate_return=True)
 def getExecutionRecords(workflow_id: str|None=None, workflow_version: int|None=None, label: str|None=None, num_limit: int|None=None, status: str|None=None) -> List[models.WorkflowExecution_Model]:
-    query = f"{API_PREFIX}executions?noparam"
+    query = f"{API_PREFIX}executions?count=none"
     if workflow_version is not None and workflow_version<0: workflow_version=None
     for n,a in [('num_limit',num_limit),('label',label),('workflow_id',workflow_id),('workflow_version',workflow_version),('status',status)]:
         if a is not None: query += f"&{n}={str(a)}"
@@ -178,17 +181,39 @@ def getExecutionRecords(workflow_id: str|None=None, workflow_version: int|None=N
 
 
 pydantic.validate_call(validate_return=True)
-def getExecutionRecord(weid: str) -> models.WorkflowExecution_Model:
-    return models.WorkflowExecution_Model.model_validate(rGet(f"{API_PREFIX}executions/{weid}", headers=getRequestHeaders())['entity'])
+def getExecutionRecord(weid: str, check_inputs: bool=False) -> models.WorkflowExecution_Model:
+    return models.WorkflowExecution_Model.model_validate(rGet(f"{API_PREFIX}executions/{weid}", params={'check_inputs': check_inputs}, headers=getRequestHeaders())['entity'])
 def getScheduledExecutions(num_limit: int|None=None):
     return getExecutionRecords(status="Scheduled", num_limit=num_limit)
 
 def getPendingExecutions(num_limit: int|None=None):
     return getExecutionRecords(status="Pending", num_limit=num_limit)
 
+def getPendingExecutionsQueue(limit: int=100) -> List[models.WorkflowExecution_Model]:
+    'Pending executions in dispatch order (priority, age and fair-share usage of user and use case).'
+    return [models.WorkflowExecution_Model.model_validate(r) for r in rGet(f"{API_PREFIX}executions/pending/queue", params={'limit': limit}, headers=getRequestHeaders())]
+
+def waitForPendingExecutions(timeout: float=30.) -> List[str]:
+    'Long-poll: block (at most *timeout* seconds) until some executions become Pending, return their IDs (empty list on timeout).'
+    return rGet(f"{API_PREFIX}executions/pending/wait", params={'timeout': timeout}, headers=getRequestHeaders(), timeout=timeout+_defaultTimeout)
+
 def scheduleExecution(execution_id: str):
     return rPatch(f"{API_PREFIX}executions/{execution_id}/schedule", headers=getRequestHeaders())
 
+def claimExecution(execution_id: str, scheduler_id: str, lease_sec: float, unowned: bool=False) -> bool:
+    '''
+    Atomically change status from Pending to Scheduled, owned by *scheduler_id*; return False if the execution was not Pending anymore.
+    With *unowned*, take over a Scheduled execution which has no owner (SchedulerID) instead.
+    '''
+    return rPatch(f"{API_PREFIX}executions/{execution_id}/claim", data=json.dumps({"schedulerID": scheduler_id, "leaseSec": lease_sec, "unowned": unowned}), headers=getRequestHeaders())
+
+def heartbeatExecutions(scheduler_id: str, ids: List[str], lease_sec: float) -> List[str]:
+    'Extend lease of executions owned by *scheduler_id*; return those which are still owned.'
+    return rPatch(f"{API_PREFIX}executions/heartbeat", data=json.dumps({"schedulerID": scheduler_id, "ids": ids, "leaseSec": lease_sec}), headers=getRequestHeaders())
+
+def reclaimExpiredExecutions():
+    return rPatch(f"{API_PREFIX}executions/reclaim_expired", headers=getRequestHeaders())
+
 def setExecutionParameter(execution_id: str, param: str, value: Any, val_type="str"):
     return rPatch(f"{API_PREFIX}executions/{execution_id}/set_param", data=json.dumps({"key": str(param), "value": value}), headers=getRequestHeaders())
 
@@ -201,7 +226,37 @@ def setExecutionOntoBaseObjectIDs(execution_id, name, value):
     return rPatch(f"{API_PREFIX}executions/{execution_id}/set_onto_base_object_ids/", data=json.dumps({"name": str(name), "value": value}), headers=getRequestHeaders())
 
 def setExecutionAttemptsCount(execution_id, val):
-    return setExecutionParameter(execution_id, "Attempts", str(val), "int")
+    return setExecutionParameter(execution_id, "Attempts", int(val), "int")
+
+def deferExecution(execution_id: str, base_sec: float, max_sec: float) -> int:
+    'Postpone next dispatch attempt of the Pending execution (exponential backoff); return the number of attempts.'
+    return rPatch(f"{API_PREFIX}executions/{execution_id}/defer", data=json.dumps({"baseSec": base_sec, "maxSec": max_sec}), headers=getRequestHeaders())
+
+def transitionExecutions(items: List[dict]) -> List[bool]:
+    '''
+    Change several executions, each atomically, in one request. Items are dicts with "id" and optionally "Status" (new status),
+    "set" (dict of fields to set: ExecutionLog, Priority, label), "inc" (dict of fields to increment: Attempts) and "expect"
+    (dict of Status and/or SchedulerID the execution must have for the change to be applied). Return whether each execution
+    was found (and matched "expect").
+    '''
+    return rPatch(f"{API_PREFIX}executions/transition", data=json.dumps(items), headers=getRequestHeaders())
+
+def transitionExecution(execution_id: str, status: models.ExecutionStatus_Literal|None=None, set: dict={}, inc: dict={}, notify: bool|Literal['always']=False, expect: dict={}) -> bool:
+    return transitionExecutions([dict(id=execution_id, Status=status, set=set, inc=inc, notify=notify, expect=expect)])[0]
+
+def notifyExecution(execution_id: str):
+    'Queue notification of the requesting user about the current status of the execution.'
+    return rPost(f"{API_PREFIX}executions/{execution_id}/notify", headers=getRequestHeaders())
+
+def insertNotification(to: str, subject: str, text: str) -> str:
+    return rPost(f"{API_PREFIX}notifications", data=json.dumps({"to": to, "subject": subject, "text": text}), headers=getRequestHeaders())
+
+def claimNotifications(worker_id: str, limit: int=100, lease_sec: float=300.) -> List[dict]:
+    'Claim notifications due to be sent; return dicts with id, to, subject, text.'
+    return rPatch(f"{API_PREFIX}notifications/claim", data=json.dumps({"workerID": worker_id, "limit": limit, "leaseSec": lease_sec}), headers=getRequestHeaders())
+
+def notificationsDone(sent: List[str], failed: List[str]):
+    return rPatch(f"{API_PREFIX}notifications/done", data=json.dumps({"sent": sent, "failed": failed}), headers=getRequestHeaders())
 
 def setExecutionStatus(execution_id: str, status: models.ExecutionStatus_Literal, revertPending=False):
     if status=='Created': setExecutionParameter(execution_id, "SubmittedDate", str(datetime.datetime.now()))
@@ -209,32 +264,39 @@ def setExecutionStatus(execution_id: str, status: models.ExecutionStatus_Literal
         setExecutionAttemptsCount(execution_id, 0)
     return setExecutionParameter(execution_id, "Status", status)
 
-def createExecution(wid: str, version: int, ip: str, no_edm=False):
-    wec=models.WorkflowExecutionCreate_Model(wid=wid,version=version,ip=ip,no_edm=no_edm)
+def createExecution(wid: str, version: int, ip: str, no_edm=False, priority: int=0):
+    wec=models.WorkflowExecutionCreate_Model(wid=wid,version=version,ip=ip,no_edm=no_edm,priority=priority)
     return rPost(f"{API_PREFIX}executions/create/", data=wec.model_dump_json(), headers=getRequestHeaders())
 
 pydantic.validate_call(validate_return=True)
 def insertExecution(m: models.WorkflowExecution_Model):
     return rPost(f"{API_PREFIX}executions/", data=m.model_dump_json(), headers=getRequestHeaders())
 
+def appendExecutionLogChunk(weid: str, seq: int, data: str) -> int:
+    return rPost(f"{API_PREFIX}executions/{weid}/log_chunks", data=json.dumps({"seq": seq, "data": data}), headers=getRequestHeaders())
+
+def getExecutionLog(weid: str, since: int=0) -> Tuple[str,int]:
+    'Return log of the execution streamed so far (starting with chunk *since*) and the number of the next chunk.'
+    res = rGet(f"{API_PREFIX}executions/{weid}/log_chunks", params={'since': since}, headers=getRequestHeaders())
+    return res['data'], res['next']
+
 def getExecutionInputRecord(weid) -> List[models.IODataRecordItem_Model]:
     return [models.IODataRecordItem_Model.model_validate(record) for record in rGet(f"{API_PREFIX}executions/{weid}/inputs/", headers=getRequestHeaders())]
 
 def getExecutionOutputRecord(weid) -> List[models.IODataRecordItem_Model]:
     return [models.IODataRecordItem_Model.model_validate(record) for record in rGet(f"{API_PREFIX}executions/{weid}/outputs/", headers=getRequestHeaders())]
 
+def _getExecutionRecordItem(weid, io: Literal['input','output'], name, obj_id) -> Optional[models.IODataRecordItem_Model]:
+    # only the item is transferred (not the whole IOData record)
+    try: return models.IODataRecordItem_Model.model_validate(rGet(f"{API_PREFIX}executions/{weid}/{io}_item/{name}/{obj_id}/", headers=getRequestHeaders()))
+    except NotFoundResponse: return None
+
 def getExecutionInputRecordItem(weid, name, obj_id) -> Optional[models.IODataRecordItem_Model]:
-    io_data = getExecutionInputRecord(weid)
-    for elem in io_data:
-        if elem.Name == name and elem.ObjID == obj_id:
-            return elem
+    return _getExecutionRecordItem(weid, 'input', name, obj_id)
 
 
 def getExecutionOutputRecordItem(weid, name, obj_id) -> Optional[models.IODataRecordItem_Model]:
-    io_data = getExecutionOutputRecord(weid)
-    for elem in io_data:
-        if elem.Name == name and elem.ObjID == obj_id:
-            return elem
+    return _getExecutionRecordItem(weid, 'output', name, obj_id)
 
 
 # --------------------------------------------------
@@ -302,15 +364,10 @@ def getStatScheduler():
 def setStatScheduler(*args, session = None, **kw):
     return updateStatScheduler(*args,**kw)
 
-def updateStatScheduler(runningTasks=None, scheduledTasks=None, load=None, processedTasks=None):
-    if runningTasks is not None:
-        rPatch(f"{API_PREFIX}scheduler_statistics/", data=json.dumps({"key": "scheduler.runningTasks", "value": runningTasks}), headers=getRequestHeaders())
-    if scheduledTasks is not None:
-        rPatch(f"{API_PREFIX}scheduler_statistics/", data=json.dumps({"key": "scheduler.scheduledTasks", "value": scheduledTasks}), headers=getRequestHeaders())
-    if load is not None:
-        rPatch(f"{API_PREFIX}scheduler_statistics/", data=json.dumps({"key": "scheduler.load", "value": load}), headers=getRequestHeaders())
-    if processedTasks is not None:
-        rPatch(f"{API_PREFIX}scheduler_statistics/", data=json.dumps({"key": "scheduler.processedTasks", "value": processedTasks}), headers=getRequestHeaders())
+def updateStatScheduler(runningTasks=None, scheduledTasks=None, load=None, processedTasks=None, inc: dict[str,int]={}):
+    'Set the given counters (and increment those in *inc*) in one atomic update.'
+    values = dict([(k, v) for k, v in (('runningTasks', runningTasks), ('scheduledTasks', scheduledTasks), ('load', load), ('processedTasks', processedTasks)) if v is not None])
+    return rPatch(f"{API_PREFIX}scheduler_statistics/update", data=json.dumps({"set": values, "inc": inc}), headers=getRequestHeaders())
 
 
 # --------------------------------------------------
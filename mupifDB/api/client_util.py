@@ -5,6 +5,7 @@ import logging
 import json
 from typing import TypeVar,Any,Callable,Optional,Dict,List,Literal
 from rich import print_json
+from .. import metrics
 log = logging.getLogger(__name__)
 
 
@@ -29,6 +30,7 @@ class NotFoundResponse(Exception):
     pass
 
 def _check(resp: Response):
+    metrics.REST_CALL.labels(resp.request.method, metrics.endpoint(str(resp.request.url))).observe(resp.elapsed.total_seconds())
     msg=f'{resp.request.method} {resp.request.url}, status {resp.status_code} ({resp.reason}): {resp.text}'
     (log.info if (200<=resp.status_code<300 and resp.status_code!=404) else log.error)(msg)
     if 200 <= resp.status_code <= 299: return resp
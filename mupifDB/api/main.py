@@ -12,7 +12,18 @@ if __name__ == '__main__' and not cmdline_opts.export_openapi:
     import os
     host=os.environ.get('MUPIFDB_RESTAPI_HOST','0.0.0.0')
     port=int(os.environ.get('MUPIFDB_RESTAPI_PORT','8005'))
-    uvicorn.run('main:app', host=host, port=port, reload=True, log_config=None)
+    workers=int(os.environ.get('MUPIFDB_RESTAPI_WORKERS','1'))
+    if workers>1:
+        # metrics of all workers are aggregated through files in this directory (must be set before prometheus_client is imported)
+        if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+            import tempfile
+            os.environ['PROMETHEUS_MULTIPROC_DIR']=tempfile.mkdtemp(prefix='mupifDB-API-metrics-')
+        else:
+            # files of a previous run (their workers are gone)
+            import glob
+            for f in glob.glob(os.environ['PROMETHEUS_MULTIPROC_DIR']+'/*.db'): os.remove(f)
+        uvicorn.run('main:app', host=host, port=port, workers=workers, log_config=None)
+    else: uvicorn.run('main:app', host=host, port=port, reload=True, log_config=None)
 
 from fastapi import APIRouter, FastAPI, UploadFile, Depends, HTTPException, Request, File, Response, status
 from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse, JSONResponse, RedirectResponse, PlainTextResponse
@@ -20,8 +31,14 @@ from fastapi.middleware.cors import CORSMiddleware
 import fastapi, fastapi.exceptions
 from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-
-from pymongo import MongoClient
+from fastapi.concurrency import run_in_threadpool
+
+from pymongo import MongoClient, AsyncMongoClient
+from gridfs import AsyncGridFSBucket
+import asyncio
+import pymongo.monitoring
+import prometheus_client
+import contextvars
 import tempfile
 import zipfile
 import importlib
@@ -29,11 +46,11 @@ import inspect
 import gridfs
 import typing
 import io
-import bson, bson.objectid
+import bson, bson.objectid, bson.json_util
 from bson.errors import InvalidId
 from bson.objectid import ObjectId
 import psutil
-from pymongo import ReturnDocument, ASCENDING
+from pymongo import ReturnDocument, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field
 import sys
 import os
@@ -44,6 +61,8 @@ import mupif as mp
 import Pyro5.api
 import pydantic
 import json
+import base64
+import hashlib
 from typing import Any, List, Literal, Optional, Iterator, TypeVar, Callable
 from rich import print_json
 from rich.pretty import pprint
@@ -53,7 +72,7 @@ from mupifDB import edm
 
 # EDM Imports
 from typing_extensions import Annotated, Self
-from typing import Union, Tuple, Set, Dict
+from typing import Union, Tuple, Set, Dict, NamedTuple
 import bson.raw_bson
 import itertools
 import re
@@ -68,6 +87,9 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 import uuid
+import threading
+import collections
+import time
 import contextlib
 from pymongo.client_session import ClientSession
 from pymongo.collection import Collection
@@ -77,9 +99,14 @@ from pydantic_core import CoreSchema, PydanticCustomError, core_schema
 # --- Configuration & Environment ---
 DEVELOPMENT = os.environ.get('DEVELOPMENT', False) in ['1','true','True','TRUE']
 this_dir = os.path.dirname(os.path.abspath(__file__))
+# number of server processes; with more than one, per-process state must be shared (see below where relevant)
+API_WORKERS = int(os.environ.get('MUPIFDB_RESTAPI_WORKERS','1'))
 APP_SECRET_KEY = os.environ.get('APP_SECRET_KEY', 'secret_jwt_key')
 if not DEVELOPMENT and APP_SECRET_KEY == 'secret_jwt_key':
     APP_SECRET_KEY = os.urandom(24).hex()
+    # tokens issued by one worker must be accepted by others: generated key is then stored in the database, once
+    _APP_SECRET_KEY_SHARED = (API_WORKERS > 1)
+else: _APP_SECRET_KEY_SHARED = False
 HTTPS_ENABLED = os.environ.get('HTTPS_ENABLED', False) in ['1','true','True','TRUE']
 SESSION_EXPIRE_MINUTES = 7 * 24 * 60
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
@@ -87,9 +114,34 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 MONITOR_SPA_PATH = os.environ.get('MONITOR_SPA_PATH', '/var/lib/mupif/monitor/dist/spa')
 MONITOR_INDEX_PATH = os.path.join(MONITOR_SPA_PATH, "index.html")
 
+# --- Metrics (Prometheus text format, served at /metrics) ---
+API_REQUEST_SECONDS = prometheus_client.Histogram('mupifdb_api_request_seconds', 'REST API request latency (until response start)', ['method', 'route'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+API_MONGO_OPS = prometheus_client.Histogram('mupifdb_api_mongo_ops_per_request', 'MongoDB commands issued while handling one request', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000))
+API_MONGO_COMMANDS = prometheus_client.Counter('mupifdb_api_mongo_commands_total', 'MongoDB commands issued', ['command'])
+API_GRIDFS_BYTES = prometheus_client.Counter('mupifdb_api_gridfs_bytes_served_total', 'Bytes of GridFS files served', ['database'])
+# counter of MongoDB commands of the request being handled (set by the middleware, propagated into worker threads)
+_requestMongoOps: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar('_requestMongoOps', default=None)
+
+class _MongoCommandCounter(pymongo.monitoring.CommandListener):
+    def started(self, event):
+        API_MONGO_COMMANDS.labels(event.command_name).inc()
+        if (ops := _requestMongoOps.get()) is not None: ops[0] += 1
+    def succeeded(self, event): pass
+    def failed(self, event): pass
+
 # --- MongoDB Connection ---
-client = MongoClient("mongodb://localhost:"+os.environ.get('MUPIFDB_MONGODB_PORT','27017'))
+MONGODB_URI = "mongodb://localhost:"+os.environ.get('MUPIFDB_MONGODB_PORT','27017')
+client = MongoClient(MONGODB_URI, event_listeners=[_MongoCommandCounter()])
 db = client.MuPIF
+# Asynchronous client, used by endpoints declared as async def: the hot paths (long-poll for pending executions, scheduler
+# leases, pending queue, execution log, IOData items, file downloads), which then do not occupy a threadpool thread while
+# waiting for the database.
+aclient = AsyncMongoClient(MONGODB_URI, event_listeners=[_MongoCommandCounter()])
+adb = aclient.MuPIF
+if _APP_SECRET_KEY_SHARED:
+    APP_SECRET_KEY = db.ServerSecrets.find_one_and_update({'_id': 'jwt'}, {'$setOnInsert': {'key': APP_SECRET_KEY}}, upsert=True, return_document=ReturnDocument.AFTER)['key']
 
 from mupifDB import models
 from mupifDB.models import User_Model
@@ -107,10 +159,75 @@ class Session_Model(BaseModel):
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str} # Still works, but V2 handles it via the custom type now
 
-# Ensure indexes for performance (especially for unique fields)
-# Note: Ensure these are created only once in a production environment
-db.user.create_index([("mail", ASCENDING)], unique=True)
-db.session.create_index([("session_token", ASCENDING)], unique=True)
+# Logs records and live execution log chunks are removed after this many days (0 keeps them forever)
+LOGS_TTL_DAYS = int(os.environ.get('MUPIFDB_LOGS_TTL_DAYS', '90'))
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str,int]]
+    options: Dict[str,Any] = {}
+    why: str = ''
+
+# Indexes of the MuPIF database, applied by apply_indexes at startup (and by db_init); changes in options of an existing
+# index (same keys) are applied by re-creating it. Indexes which are not listed here are left alone.
+INDEXES: List[IndexSpec] = [
+    IndexSpec('user', [("mail", ASCENDING)], {'unique': True}, 'login'),
+    IndexSpec('session', [("session_token", ASCENDING)], {'unique': True}, 'authentication'),
+    IndexSpec('session', [("expires_at", ASCENDING)], {'expireAfterSeconds': 0}, 'removal of expired sessions (TTL)'),
+    IndexSpec('WorkflowExecutions', [("Status", ASCENDING), ("LeaseExpiresAt", ASCENDING)], {}, 'reclaiming expired leases of scheduler instances'),
+    IndexSpec('WorkflowExecutions', [("Status", ASCENDING), ("Priority", DESCENDING), ("CreatedDate", ASCENDING)], {}, 'candidates of the pending queue'),
+    IndexSpec('WorkflowExecutions', [("DependsOn", ASCENDING)], {}, 'Blocked executions waiting for an upstream execution'),
+    IndexSpec('WorkflowExecutions', [("InputsHash", ASCENDING), ("Status", ASCENDING)], {}, 'result cache lookup'),
+    IndexSpec('WorkflowExecutions', [("CreatedDate", DESCENDING), ("_id", DESCENDING)], {}, 'executions listing, newest first (keyset pagination)'),
+    IndexSpec('WorkflowExecutions', [("Status", ASCENDING), ("CreatedDate", DESCENDING), ("_id", DESCENDING)], {}, 'executions listing by status'),
+    IndexSpec('WorkflowExecutions', [("WorkflowID", ASCENDING), ("WorkflowVersion", ASCENDING), ("CreatedDate", DESCENDING), ("_id", DESCENDING)], {}, 'executions listing by workflow'),
+    IndexSpec('WorkflowExecutions', [("label", ASCENDING), ("CreatedDate", DESCENDING), ("_id", DESCENDING)], {}, 'executions listing by label'),
+    IndexSpec('ExecutionLogChunks', [("execution", ASCENDING), ("seq", ASCENDING)], {'unique': True}, 'live execution log'),
+    IndexSpec('Notifications', [("Status", ASCENDING), ("NextAttemptAt", ASCENDING)], {}, 'notifications due to be sent'),
+    IndexSpec('Workflows', [("wid", ASCENDING), ("Version", ASCENDING)], {}, 'workflow by wid (and version), also joined in get_execution'),
+    IndexSpec('WorkflowsHistory', [("wid", ASCENDING), ("Version", ASCENDING)], {}, 'archived workflow versions'),
+    IndexSpec('fs.files', [("metadata.parent.where", ASCENDING), ("metadata.parent.id", ASCENDING)], {}, 'files of a parent object'),
+]+([
+    IndexSpec('Logs', [("createdAt", ASCENDING)], {'expireAfterSeconds': LOGS_TTL_DAYS*86400}, 'removal of old logs (TTL)'),
+    # chunks are otherwise only removed when the complete log is stored, or the execution is reset
+    IndexSpec('ExecutionLogChunks', [("createdAt", ASCENDING)], {'expireAfterSeconds': LOGS_TTL_DAYS*86400}, 'removal of live logs of crashed or abandoned executions (TTL)'),
+] if LOGS_TTL_DAYS > 0 else [])
+
+
+# Indexes created by earlier versions which are superseded by INDEXES, dropped by apply_indexes (collection, index name)
+OBSOLETE_INDEXES: List[Tuple[str,str]] = [
+    ('Workflows', 'wid_1'), # prefix of (wid, Version)
+]
+
+def _apply_index(coll, spec: IndexSpec) -> None:
+    try: coll.create_index(spec.keys, **spec.options)
+    except pymongo.errors.OperationFailure as e:
+        # IndexOptionsConflict, IndexKeySpecsConflict: same keys (or name), different options
+        if e.code not in (85, 86): raise
+        old = next((i for i in coll.list_indexes() if list(i['key'].items()) == spec.keys), None)
+        if old is None: raise
+        log.warning(f'Re-creating index {coll.name}.{old["name"]} with options {spec.options}.')
+        coll.drop_index(old['name'])
+        coll.create_index(spec.keys, **spec.options)
+
+def apply_indexes(database: Database) -> None:
+    '''
+    Create indexes from INDEXES in *database* and drop OBSOLETE_INDEXES; idempotent. Each server worker runs this at
+    startup, so another worker may be re-creating the same index concurrently: such conflicts are retried once.
+    '''
+    for spec in INDEXES:
+        for retry in (False, True):
+            try:
+                _apply_index(database[spec.collection], spec)
+                break
+            except pymongo.errors.OperationFailure as e:
+                # IndexNotFound, IndexOptionsConflict, IndexKeySpecsConflict
+                if retry or e.code not in (27, 85, 86): raise
+    for coll, name in OBSOLETE_INDEXES:
+        try: database[coll].drop_index(name)
+        except pymongo.errors.OperationFailure as e:
+            # NamespaceNotFound, IndexNotFound: nothing to drop
+            if e.code not in (26, 27): raise
 
 
 # --- JWT Security Configuration & Utilities ---
@@ -202,6 +319,7 @@ def create_session(user_id_str: str) -> str:
 def delete_session(session_token: str):
     """Deletes a session record based on its token."""
     db.session.delete_one({"session_token": session_token})
+    auth_cache.invalidate(session_token=session_token)
 
 def get_session_by_token(session_token: str) -> Optional[Session_Model]:
     """Retrieves a valid session record from the database."""
@@ -214,6 +332,82 @@ def get_session_by_token(session_token: str) -> Optional[Session_Model]:
         return Session_Model.model_validate(session_doc)
     return None
 
+async def aget_session_by_token(session_token: str) -> Optional[Session_Model]:
+    """Async variant of get_session_by_token, for use on the event loop."""
+    now = datetime.now(timezone.utc)
+    session_doc = await adb.session.find_one({
+        "session_token": session_token,
+        "expires_at": {"$gt": now}
+    })
+    if session_doc:
+        return Session_Model.model_validate(session_doc)
+    return None
+
+async def aget_user_by_id(user_id_str: str) -> Optional[User_Model]:
+    """Async variant of get_user_by_id, for use on the event loop."""
+    try:
+        user_doc = await adb.user.find_one({"_id": ObjectId(user_id_str)})
+        if user_doc:
+            return User_Model.model_validate(user_doc)
+        return None
+    except InvalidId:
+        return None
+
+class AuthCache(object):
+    '''
+    Resolved sessions (session token -> session record and user), so that authenticated requests do not query the database.
+    Entries are kept for at most AUTH_CACHE_TTL_SEC (and not beyond the session expiry), AUTH_CACHE_SIZE least recently used
+    ones at most; they are invalidated when the session is deleted or the user updated. With several server workers, other
+    workers learn about invalidations through the version number in the CacheInvalidation collection (checked at most every
+    CHECK_SEC), or after TTL at the latest.
+    '''
+    CHECK_SEC = 1.
+
+    def __init__(self, ttl: float, size: int):
+        self.ttl, self.size = ttl, size
+        self.lock = threading.Lock()
+        self.entries: collections.OrderedDict[str, tuple[float, Session_Model, User_Model]] = collections.OrderedDict()
+        self.version, self.checked = None, 0.
+
+    def set_version(self, ver: int) -> None:
+        with self.lock:
+            if ver != self.version: self.entries.clear()
+            self.version, self.checked = ver, time.monotonic()
+
+    async def check_version(self) -> None:
+        'Drop all entries if another worker invalidated some since; only queries the database with several workers, at most every CHECK_SEC.'
+        if self.size <= 0 or API_WORKERS <= 1 or time.monotonic()-self.checked < self.CHECK_SEC: return
+        rec = await adb.CacheInvalidation.find_one({'_id': 'auth'})
+        self.set_version(rec['version'] if rec else 0)
+
+    def get(self, session_token: str) -> Optional[tuple[Session_Model, User_Model]]:
+        if self.size <= 0: return None
+        with self.lock:
+            ent = self.entries.get(session_token)
+            if ent is None: return None
+            if ent[0] < time.monotonic():
+                del self.entries[session_token]
+                return None
+            self.entries.move_to_end(session_token)
+            return ent[1], ent[2]
+
+    def put(self, session: Session_Model, user: User_Model) -> None:
+        if self.size <= 0: return
+        expires = time.monotonic()+min(self.ttl, (session.expires_at.replace(tzinfo=session.expires_at.tzinfo or timezone.utc)-datetime.now(timezone.utc)).total_seconds())
+        with self.lock:
+            self.entries[session.session_token] = (expires, session, user)
+            self.entries.move_to_end(session.session_token)
+            while len(self.entries) > self.size: self.entries.popitem(last=False)
+
+    def invalidate(self, *, session_token: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        with self.lock:
+            for tok in [tok for tok, (_, s, _) in self.entries.items() if tok == session_token or s.user_id == user_id]: del self.entries[tok]
+        if API_WORKERS > 1: db.CacheInvalidation.update_one({'_id': 'auth'}, {'$inc': {'version': 1}}, upsert=True)
+
+AUTH_CACHE_TTL_SEC = float(os.environ.get('MUPIFDB_AUTH_CACHE_TTL_SEC', '30'))
+AUTH_CACHE_SIZE = int(os.environ.get('MUPIFDB_AUTH_CACHE_SIZE', '10000'))
+auth_cache = AuthCache(ttl=AUTH_CACHE_TTL_SEC, size=AUTH_CACHE_SIZE)
+
 # --- Dependency to get the database connection (Placeholder) ---
 
 # def get_db_connection():
@@ -265,8 +459,10 @@ async def get_current_authenticated_user(
             detail="Invalid authentication credentials, token tampered or expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        
-    session_record = get_session_by_token(session_id)
+
+    await auth_cache.check_version()
+    cached = auth_cache.get(session_id)
+    session_record = (cached[0] if cached else await aget_session_by_token(session_id))
 
     if session_record is None:
         raise HTTPException(
@@ -297,17 +493,19 @@ async def get_current_authenticated_user(
             samesite="lax"
         )
         
-    user = get_user_by_id(session_record.user_id)
+    if cached: return cached[1].model_copy()
+    user = await aget_user_by_id(session_record.user_id)
 
     if user is None:
         # Critical error: session exists but linked user doesn't. Revoke session.
-        delete_session(session_record.session_token)
+        await run_in_threadpool(delete_session, session_record.session_token)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated: User linked to session not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        
+
+    auth_cache.put(session_record, user.model_copy())
     return user
 
 async def get_optional_user(
@@ -356,7 +554,7 @@ async def get_valid_session_from_header(
             headers={"WWW-Authenticate": "Bearer"},
         )
         
-    session_record = get_session_by_token(session_id)
+    session_record = await aget_session_by_token(session_id)
 
     if session_record is None:
         raise HTTPException(
@@ -412,8 +610,8 @@ class Perms(object):
     def filterSelfRead(self,objs: List[T]) -> List[T]: return [obj for obj in objs if self.has(obj,perm='read',on='self')]
     def notRemote(self, request: Request, diag: str):
         import ipaddress
-        if request.client is None: raise ForbiddenError('Client address unknown ({diag}).')
-        if not ipaddress.ip_address(request.client.host).is_loopback: raise ForbiddenError('Remote access (from {requests.client.host}) forbidden ({diag}).')
+        if request.client is None: raise ForbiddenError(f'Client address unknown ({diag}).')
+        if not ipaddress.ip_address(request.client.host).is_loopback: raise ForbiddenError(f'Remote access (from {request.client.host}) forbidden ({diag}).')
 
 perms = Perms(db=db)
 
@@ -469,7 +667,19 @@ tags_metadata = [
 # ]
 
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # not at import time, so that the module can be imported (--export-openapi, tests) without the database running
+    apply_indexes(db)
+    yield
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # remove live gauges of this worker from the aggregated metrics
+        import prometheus_client.multiprocess
+        prometheus_client.multiprocess.mark_process_dead(os.getpid())
+
+
 app = FastAPI(
+    lifespan=lifespan,
     openapi_tags=tags_metadata,
     # servers=servers_list,
     redirect_slashes=True,
@@ -484,6 +694,35 @@ async def validation_exception_handler(request: fastapi.Request, exc: fastapi.ex
     return fastapi.responses.JSONResponse(content=content, status_code=fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY)
 
 
+@app.middleware('http')
+async def metrics_middleware(request: fastapi.Request, call_next):
+    ops = [0]
+    token = _requestMongoOps.set(ops)
+    t0 = time.perf_counter()
+    try: response = await call_next(request)
+    finally: _requestMongoOps.reset(token)
+    route = request.scope.get('route')
+    path = (route.path if route is not None else 'unmatched')
+    API_REQUEST_SECONDS.labels(request.method, path).observe(time.perf_counter()-t0)
+    API_MONGO_OPS.labels(path).observe(ops[0])
+    return response
+
+
+# Prometheus scraping from other hosts (otherwise only from loopback)
+METRICS_REMOTE = (os.environ.get('MUPIFDB_METRICS_REMOTE', '0') == '1')
+
+@app.get('/metrics', include_in_schema=False)
+def get_metrics(request: Request):
+    if not METRICS_REMOTE: perms.notRemote(request, 'metrics; set MUPIFDB_METRICS_REMOTE=1 to allow')
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # aggregate over all workers
+        import prometheus_client.multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        prometheus_client.multiprocess.MultiProcessCollector(registry)
+        return Response(content=prometheus_client.generate_latest(registry), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+    return Response(content=prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -690,6 +929,7 @@ def update_user(user_id: str, user_update: UserUpdate, current_user: User_Model
     
     if updated_user_doc is None:
         raise NotFoundError(f'User with id={user_id} not found.')
+    auth_cache.invalidate(user_id=user_id)
     
     updated_user = User_Model.model_validate(updated_user_doc)
     updated_user.password = "********"  # Mask password
@@ -1112,6 +1352,24 @@ def insert_workflow_history(wf: models.Workflow_Model, current_user: User_Model
 # Executions
 # --------------------------------------------------
 
+# counting is stopped at this number with count=capped
+EXECUTIONS_COUNT_CAP = 10000
+
+
+def _executions_cursor_encode(rec: dict) -> str:
+    # extended JSON, as CreatedDate is a datetime (or a string in old records)
+    return base64.urlsafe_b64encode(bson.json_util.dumps([rec.get('CreatedDate'), str(rec['_id'])]).encode()).decode()
+
+
+def _executions_cursor_query(cursor: str) -> dict:
+    'Condition selecting executions after *cursor* in the (CreatedDate, _id) descending order.'
+    try:
+        created, oid = bson.json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        oid = bson.objectid.ObjectId(oid)
+    except Exception: raise HTTPException(status_code=400, detail='Invalid cursor.')
+    return {'$or': [{'CreatedDate': {'$lt': created}}, {'CreatedDate': created, '_id': {'$lt': oid}}]}
+
+
 @api_router.get("/executions", tags=["Executions"], response_model=models.ExecutionCollectionResponse)
 def get_executions(
     status: str = "",
@@ -1121,9 +1379,18 @@ def get_executions(
     label: str = "",
     page: int = 1,
     pageSize: int = 20,
+    cursor: str = "",
+    count: Literal['exact','capped','estimated','none'] = 'exact',
     current_user: User_Model = Depends(get_current_authenticated_user)
 ) -> models.ExecutionCollectionResponse:
-    
+    '''
+    Executions, newest first. Pages are selected either by *page* (skipping all previous items, slow for deep pages) or
+    by *cursor*, which is the ``next`` token of the previous page (keyset pagination; *page* is then only echoed back).
+
+    *count* selects how totalCount is obtained: ``exact`` counts all matching executions; ``capped`` stops at
+    EXECUTIONS_COUNT_CAP; ``estimated`` uses collection metadata when there is no filter (capped count otherwise);
+    ``none`` does not count.
+    '''
     if page < 1:
         page = 1
     if pageSize < 1:
@@ -1144,106 +1411,227 @@ def get_executions(
     if label:
         filtering["label"] = label
     
-    skip = (page - 1) * pageSize
-    
-    res = (
-        db.WorkflowExecutions.find(filtering)
-        .sort('CreatedDate', -1)
+    query = ({'$and': [filtering, _executions_cursor_query(cursor)]} if cursor else filtering)
+    skip = (0 if cursor else (page - 1) * pageSize)
+
+    res = list(
+        db.WorkflowExecutions.find(query)
+        .sort([('CreatedDate', -1), ('_id', -1)])
         .skip(skip)
         .limit(pageSize)
     )
-    
+
+    totalCount, exact = None, True
+    if count == 'estimated' and not filtering: totalCount, exact = db.WorkflowExecutions.estimated_document_count(), False
+    elif count in ('capped', 'estimated'):
+        totalCount = db.WorkflowExecutions.count_documents(filtering, limit=EXECUTIONS_COUNT_CAP)
+        exact = totalCount < EXECUTIONS_COUNT_CAP
+    elif count == 'exact': totalCount = db.WorkflowExecutions.count_documents(filtering)
+
     return models.ExecutionCollectionResponse(
         collection=perms.filterSelfRead([models.WorkflowExecution_Model.model_validate(r) for r in res]),
         pagination = models.Pagination_Model(
             page=page,
             pageSize=pageSize,
-            totalCount=db.WorkflowExecutions.count_documents(filtering)
+            totalCount=totalCount,
+            totalCountExact=exact,
+            next=(_executions_cursor_encode(res[-1]) if len(res) == pageSize else None),
         )
     )
 
+# maximum time a single long-poll request may block the server
+PENDING_WAIT_MAX_SEC = 60
+# polling period when change streams are not available (mongod not running as replica set)
+PENDING_WAIT_POLL_SEC = 1.
+# None: not yet known; set after the first attempt to open a change stream
+_change_streams_supported: Optional[bool] = None
+
+async def _wait_pending_change_stream(deadline: float) -> List[str]:
+    # only report transitions *to* Pending; other updates of pending executions (such as attempts count) are not interesting
+    pipeline = [{'$match': {'$or': [
+        {'operationType': {'$in': ['insert', 'replace']}, 'fullDocument.Status': 'Pending'},
+        {'operationType': 'update', 'updateDescription.updatedFields.Status': 'Pending'},
+    ]}}]
+    async with await adb.WorkflowExecutions.watch(pipeline, max_await_time_ms=int(1000*PENDING_WAIT_POLL_SEC)) as stream:
+        while stream.alive and time.monotonic() < deadline:
+            ids = []
+            while (change := await stream.try_next()) is not None:
+                ids.append(str(change['documentKey']['_id']))
+            if ids: return ids
+    return []
+
+def _pending_ready(now: datetime) -> dict:
+    'Query for Pending executions whose retry backoff (if any) expired at *now*.'
+    return {'Status': 'Pending', '$or': [{'NextAttemptAt': None}, {'NextAttemptAt': {'$lte': now}}]}
+
+async def _wait_pending_poll(deadline: float) -> List[str]:
+    # SubmittedDate is set (as isoformat string) when the execution becomes Pending
+    since = datetime.now().isoformat()
+    while True:
+        ids = [str(r['_id']) async for r in adb.WorkflowExecutions.find({'Status': 'Pending', 'SubmittedDate': {'$gte': since}}, {'_id': 1})]
+        if ids or time.monotonic() >= deadline: return ids
+        await asyncio.sleep(min(PENDING_WAIT_POLL_SEC, max(0., deadline-time.monotonic())))
+
+@api_router.get("/executions/pending/wait", tags=["Executions"])
+async def wait_pending_executions(timeout: float = 30., current_user: User_Model = Depends(get_current_authenticated_user)) -> List[str]:
+    """
+    Long-poll for executions becoming Pending. Blocks for at most *timeout* seconds (capped at PENDING_WAIT_MAX_SEC)
+    and returns IDs of executions which became Pending in the meantime; returns an empty list on timeout.
+
+    Uses change stream on WorkflowExecutions if the database supports it (replica set), otherwise falls back to polling.
+    """
+    global _change_streams_supported
+    deadline = time.monotonic()+max(0., min(timeout, PENDING_WAIT_MAX_SEC))
+    if _change_streams_supported is not False:
+        try:
+            ret = await _wait_pending_change_stream(deadline)
+            _change_streams_supported = True
+            return ret
+        except pymongo.errors.OperationFailure:
+            if _change_streams_supported is None: log.warning('Change streams not supported by the database (not a replica set?), polling for pending executions instead.')
+            _change_streams_supported = False
+    return await _wait_pending_poll(deadline)
+
+
+# Fair-share: every finished execution charges its run time (seconds) to the user who requested it and to the use case
+# of its workflow (FairShare collection, _id 'user:…' or 'usecase:…'); the usage decays exponentially with
+# FAIRSHARE_HALFLIFE_SEC. Pending executions are dispatched by score = priority + age - recent usage of user and use case.
+FAIRSHARE_HALFLIFE_SEC = float(os.environ.get('MUPIFDB_FAIRSHARE_HALFLIFE_SEC', 6*3600))
+FAIRSHARE_PRIORITY_WEIGHT = 1.
+FAIRSHARE_AGE_WEIGHT = 1.    # per hour spent in the queue
+FAIRSHARE_USER_WEIGHT = 1.   # per hour of (decayed) usage
+FAIRSHARE_USECASE_WEIGHT = .5
+# number of pending executions (in priority and age order, using index) considered for fair-share ordering
+PENDING_QUEUE_WINDOW = 5000
+# allowed range of execution priority; only admins may set priority above 0
+PRIORITY_MIN = int(os.environ.get('MUPIFDB_PRIORITY_MIN', '-10'))
+PRIORITY_MAX = int(os.environ.get('MUPIFDB_PRIORITY_MAX', '10'))
+
+def _execution_priority(priority: int, user: User_Model) -> int:
+    'Priority requested by *user*, clamped to the range the user may set.'
+    return max(PRIORITY_MIN, min(PRIORITY_MAX if user.rights_admin else 0, priority))
+
+def _fairshare_decayed(usage, updated, now: datetime):
+    'Aggregation expression for *usage* decayed from *updated* until *now*.'
+    return {'$multiply': [{'$ifNull': [usage, 0]}, {'$pow': [.5, {'$divide': [{'$subtract': [now, {'$ifNull': [updated, now]}]}, 1000*FAIRSHARE_HALFLIFE_SEC]}]}]}
+
+def _fairshare_charge(rec: dict) -> None:
+    'Add run time of the finished execution *rec* to the usage of its user and use case.'
+    try: seconds = (datetime.fromisoformat(rec['EndDate'])-datetime.fromisoformat(rec['StartDate'])).total_seconds()
+    except (KeyError, TypeError, ValueError): return
+    now = datetime.now(timezone.utc)
+    for key in [f'user:{rec.get("RequestedBy")}']+([f'usecase:{rec["UseCase"]}'] if rec.get('UseCase') else []):
+        db.FairShare.update_one({'_id': key}, [{'$set': {'Usage': {'$add': [_fairshare_decayed('$Usage', '$UpdatedAt', now), seconds]}, 'UpdatedAt': now}}], upsert=True)
+
+@api_router.get("/executions/pending/queue", tags=["Executions"])
+async def get_pending_queue(limit: int = 100, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[models.WorkflowExecution_Model]:
+    """
+    Pending executions in dispatch order: by priority, time spent in the queue and recent usage (fair-share) of the requesting
+    user and use case. Executions waiting for retry (NextAttemptAt in the future) are skipped. Candidates are selected by the (Status, Priority, CreatedDate) index, ordering is done by the database.
+    """
+    perms.TODO()
+    now, nowUtc = datetime.now(), datetime.now(timezone.utc)
+    def hours(expr): return {'$divide': [expr, 3600.]}
+    def usage(var: str): return hours(_fairshare_decayed({'$first': f'${var}.Usage'}, {'$first': f'${var}.UpdatedAt'}, nowUtc))
+    queued = {'$ifNull': [{'$convert': {'input': '$SubmittedDate', 'to': 'date', 'onError': None}}, {'$toDate': '$CreatedDate'}]}
+    res = await adb.WorkflowExecutions.aggregate([
+        {'$match': _pending_ready(nowUtc)},
+        {'$sort': {'Priority': -1, 'CreatedDate': 1}},
+        {'$limit': PENDING_QUEUE_WINDOW},
+        {'$addFields': {'_userKey': {'$concat': ['user:', {'$ifNull': ['$RequestedBy', '']}]}, '_usecaseKey': {'$concat': ['usecase:', {'$ifNull': ['$UseCase', '']}]}}},
+        {'$lookup': {'from': 'FairShare', 'localField': '_userKey', 'foreignField': '_id', 'as': '_userUsage'}},
+        {'$lookup': {'from': 'FairShare', 'localField': '_usecaseKey', 'foreignField': '_id', 'as': '_usecaseUsage'}},
+        {'$addFields': {'_score': {'$subtract': [
+            {'$add': [
+                {'$multiply': [FAIRSHARE_PRIORITY_WEIGHT, {'$ifNull': ['$Priority', 0]}]},
+                {'$multiply': [FAIRSHARE_AGE_WEIGHT, hours({'$divide': [{'$subtract': [now, queued]}, 1000]})]},
+            ]},
+            {'$add': [
+                {'$multiply': [FAIRSHARE_USER_WEIGHT, usage('_userUsage')]},
+                {'$multiply': [FAIRSHARE_USECASE_WEIGHT, usage('_usecaseUsage')]},
+            ]},
+        ]}}},
+        {'$sort': {'_score': -1, 'CreatedDate': 1}},
+        {'$limit': limit},
+        {'$project': {'_score': 0, '_userKey': 0, '_usecaseKey': 0, '_userUsage': 0, '_usecaseUsage': 0}},
+    ])
+    return [models.WorkflowExecution_Model.model_validate(r) async for r in res]
+
+
 def get_execution_base(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionEntityResponse:
     res = db.WorkflowExecutions.find_one({"_id": bson.objectid.ObjectId(uid)})
     if res is None: raise NotFoundError(f'Database reports no execution with uid={uid}.')
     return models.ExecutionEntityResponse(entity=perms.ensure(models.WorkflowExecution_Model.model_validate(res)))
 
-def get_execution_with_inputs(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionEntityResponse:
-    res = db.WorkflowExecutions.find_one({"_id": bson.objectid.ObjectId(uid)})
+def _execution_lookup(uid: str) -> dict:
+    '''
+    Execution *uid* with its input and output IOData and the ref to its workflow, in one aggregation (instead of separate
+    queries for each); the raw IOData records are in _inputs and _outputs, the workflow ref in 'workflow'.
+    '''
+    def oid(field): return {'$convert': {'input': field, 'to': 'objectId', 'onError': None, 'onNull': None}}
+    res = next(db.WorkflowExecutions.aggregate([
+        {'$match': {'_id': bson.objectid.ObjectId(uid)}},
+        {'$addFields': {'_inputsId': oid('$Inputs'), '_outputsId': oid('$Outputs')}},
+        {'$lookup': {'from': 'IOData', 'localField': '_inputsId', 'foreignField': '_id', 'as': '_inputs'}},
+        {'$lookup': {'from': 'IOData', 'localField': '_outputsId', 'foreignField': '_id', 'as': '_outputs'}},
+        # current version of the workflow, and the archived one in case the execution is not of the current version
+        {'$lookup': {'from': 'Workflows', 'localField': 'WorkflowID', 'foreignField': 'wid', 'as': '_wf', 'pipeline': [{'$project': {'_id': 1, 'Version': 1}}]}},
+        {'$lookup': {'from': 'WorkflowsHistory', 'let': {'wid': '$WorkflowID', 'ver': '$WorkflowVersion'}, 'as': '_wfh', 'pipeline': [
+            {'$match': {'$expr': {'$and': [{'$eq': ['$wid', '$$wid']}, {'$eq': ['$Version', '$$ver']}]}}},
+            {'$project': {'_id': 1}},
+            {'$limit': 1},
+        ]}},
+    ]), None)
     if res is None: raise NotFoundError(f'Database reports no execution with uid={uid}.')
-    inputsId = res.get('Inputs', None)
-    outputsId = res.get('Outputs', None)
-    if inputsId is not None:
-        try:
-            res_io = db.IOData.find_one({'_id': bson.objectid.ObjectId(inputsId)})
-            if res_io is not None:
-                res['InputsData'] = models.IODataRecord_Model.model_validate(res_io).DataSet
-        except Exception as e:
-            print(e)
-    if outputsId is not None:
+    wf, wfh = res.pop('_wf'), res.pop('_wfh')
+    if res.get('workflow', None) is None:
+        if wf and res.get('WorkflowVersion') in (-1, wf[0].get('Version')): res['workflow'] = str(wf[0]['_id'])
+        elif wf and wfh: res['workflow'] = str(wfh[0]['_id'])
+    for k in ('_inputsId', '_outputsId'): res.pop(k)
+    res['_inputs'] = (res['_inputs'][0] if res['_inputs'] else None)
+    res['_outputs'] = (res['_outputs'][0] if res['_outputs'] else None)
+    return res
+
+
+def _execution_io_data(res: dict, edm: bool) -> None:
+    '''Set InputsData and OutputsData of *res* (from _execution_lookup); with *edm*, resolve EDM entities of the items from EDMMapping.'''
+    edmByName = {m['Name']: m for m in res.get('EDMMapping', [])}
+    for raw, attr in ((res.pop('_inputs'), 'InputsData'), (res.pop('_outputs'), 'OutputsData')):
+        if raw is None: continue
         try:
-            res_io = db.IOData.find_one({'_id': bson.objectid.ObjectId(outputsId)})
-            if res_io is not None:
-                res['OutputsData'] = models.IODataRecord_Model.model_validate(res_io).DataSet
+            res[attr] = models.IODataRecord_Model.model_validate(raw).DataSet
+            if not edm: continue
+            for item in res[attr]:
+                if item.EDMPath:
+                    edmRecord = edmByName.get(item.EDMPath.split('.')[0])
+                    item.edmEntityId = edmRecord['id'] if edmRecord else None
+                    item.edmEntityType = edmRecord['EDMEntity'] if edmRecord else None
+                    item.edmEntityDatabase = edmRecord['DBName'] if edmRecord else None
         except Exception as e:
             print(e)
+
+
+def get_execution_with_inputs(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionEntityResponse:
+    res = _execution_lookup(uid)
+    _execution_io_data(res, edm=False)
     return models.ExecutionEntityResponse(entity=perms.ensure(models.WorkflowExecution_Model.model_validate(res)))
 
 @api_router.get("/executions/{uid}", tags=["Executions"], response_model=models.ExecutionEntityResponse)
-def get_execution(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionEntityResponse:
-    res = db.WorkflowExecutions.find_one({"_id": bson.objectid.ObjectId(uid)})
-    if res is None: raise NotFoundError(f'Database reports no execution with uid={uid}.')
-    inputsId = res.get('Inputs', None)
-    outputsId = res.get('Outputs', None)
-    if res.get('workflow', None) is None:
-        try:
-            w = get_workflow_by_version(res['WorkflowID'], res['WorkflowVersion'], current_user=current_user).entity
-            if w is not None:
-                res['workflow'] = w.dbID
-        except Exception as e:
-            print(e)
-    if inputsId is not None:
-        try:
-            res_io = db.IOData.find_one({'_id': bson.objectid.ObjectId(inputsId)})
-            if res_io is not None:
-                res['InputsData'] = models.IODataRecord_Model.model_validate(res_io).DataSet
-                for item in res['InputsData']:
-                    if item.EDMPath:
-                        target_name = item.EDMPath.split('.')[0]
-                        edmRecord = next((m for m in res['EDMMapping'] if m['Name'] == target_name), None)
-                        item.edmEntityId = edmRecord['id'] if edmRecord else None
-                        item.edmEntityType = edmRecord['EDMEntity'] if edmRecord else None
-                        item.edmEntityDatabase = edmRecord['DBName'] if edmRecord else None
-        except Exception as e:
-            print(e)
-    if outputsId is not None:
-        try:
-            res_io = db.IOData.find_one({'_id': bson.objectid.ObjectId(outputsId)})
-            if res_io is not None:
-                res['OutputsData'] = models.IODataRecord_Model.model_validate(res_io).DataSet
-                for item in res['OutputsData']:
-                    if item.EDMPath:
-                        target_name = item.EDMPath.split('.')[0]
-                        edmRecord = next((m for m in res['EDMMapping'] if m['Name'] == target_name), None)
-                        item.edmEntityId = edmRecord['id'] if edmRecord else None
-                        item.edmEntityType = edmRecord['EDMEntity'] if edmRecord else None
-                        item.edmEntityDatabase = edmRecord['DBName'] if edmRecord else None
-        except Exception as e:
-            print(e)
-    # execLog = res.get('ExecutionLog', None)
-    # if outputsId is not None:
-    #     try:
-    #         res_io = db.IOData.find_one({'_id': bson.objectid.ObjectId(execLog)})
-    #         if res_io is not None:
-    #             res['Log'] = models.IODataRecord_Model.model_validate(res_io).DataSet
-    #     except Exception as e:
-    #         print(e)
-    if res['Status'] == 'Created':
+def get_execution(uid: str, check_inputs: bool = True, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionEntityResponse:
+    '''
+    Execution record with its inputs and outputs. For Created executions, canBeSubmitted is evaluated unless *check_inputs*
+    is false (it may query other executions and the EDM for every input, so clients which don't need it should skip it).
+    '''
+    res = _execution_lookup(uid)
+    _execution_io_data(res, edm=True)
+    ex = perms.ensure(models.WorkflowExecution_Model.model_validate(res))
+    if ex.Status == 'Created' and check_inputs:
         try:
-            res['canBeSubmitted'] = check_execution_inputs(uid, current_user=current_user)
+            ex.canBeSubmitted = _check_execution_inputs(ex)
         except Exception as e:
             print(e)
-            res['canBeSubmitted'] = False
-    return models.ExecutionEntityResponse(entity=perms.ensure(models.WorkflowExecution_Model.model_validate(res)))
+            ex.canBeSubmitted = False
+    return models.ExecutionEntityResponse(entity=ex)
 
 # FIXME: how is this different from get_execution??
 @api_router.get("/edm_execution/{uid}", tags=["Executions"], response_model=models.ExecutionEntityResponse)
@@ -1300,6 +1688,8 @@ def create_execution(wec: models.WorkflowExecutionCreate_Model, current_user: Us
         WorkflowVersion=wdoc.Version,
         RequestedBy=current_user.mail,
         CreatedDate=datetime.now(),
+        Priority=wec.priority,
+        UseCase=wdoc.UseCase,
         Inputs=inputsId,
         Outputs=outputsId,
         EDMMapping=([] if wec.no_edm else wdoc.EDMMapping),
@@ -1310,6 +1700,7 @@ def create_execution(wec: models.WorkflowExecutionCreate_Model, current_user: Us
 @api_router.post("/executions", tags=["Executions"])
 def insert_execution(data: models.WorkflowExecution_Model, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.CreateNewExecutionEntityResponse:
     perms.ensure(data,perm='child',on='parent')
+    data.Priority = _execution_priority(data.Priority, current_user)
     res = db.WorkflowExecutions.insert_one(data.model_dump_db())
     entity = get_execution(str(res.inserted_id), current_user=current_user).entity
     return models.CreateNewExecutionEntityResponse(
@@ -1319,7 +1710,7 @@ def insert_execution(data: models.WorkflowExecution_Model, current_user: User_Mo
 
 @api_router.get("/executions/{uid}/inputs", tags=["Executions"])
 def get_execution_inputs(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[models.IODataRecordItem_Model]:
-    ex = get_execution(uid, current_user=current_user).entity # checks perms already
+    ex = get_execution(uid, check_inputs=False, current_user=current_user).entity # checks perms already
     if ex.Inputs: 
         res = db.IOData.find_one({'_id': bson.objectid.ObjectId(ex.Inputs)})
         if res is None:
@@ -1330,7 +1721,7 @@ def get_execution_inputs(uid: str, current_user: User_Model = Depends(get_curren
 
 @api_router.get("/executions/{uid}/outputs", tags=["Executions"])
 def get_execution_outputs(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[models.IODataRecordItem_Model]:
-    ex = get_execution(uid, current_user=current_user).entity # checks perms already
+    ex = get_execution(uid, check_inputs=False, current_user=current_user).entity # checks perms already
     if ex.Outputs:
         res = db.IOData.find_one({'_id': bson.objectid.ObjectId(ex.Outputs)})
         if res is None:
@@ -1341,7 +1732,7 @@ def get_execution_outputs(uid: str, current_user: User_Model = Depends(get_curre
 
 @api_router.get("/executions/{uid}/inputs_with_edm", tags=["Executions"])
 def get_execution_inputs_with_edm(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionInputsCollectionResponse:
-    ex = get_execution(uid, current_user=current_user).entity # checks perms already
+    ex = get_execution(uid, check_inputs=False, current_user=current_user).entity # checks perms already
     if ex.Inputs: 
         res = db.IOData.find_one({'_id': bson.objectid.ObjectId(ex.Inputs)})
         if res is None:
@@ -1397,7 +1788,7 @@ def get_execution_inputs_with_edm(uid: str, current_user: User_Model = Depends(g
 
 @api_router.get("/executions/{uid}/outputs_with_edm", tags=["Executions"])
 def get_execution_outputs_with_edm(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.ExecutionOutputsCollectionResponse:
-    ex = get_execution(uid, current_user=current_user).entity # checks perms already
+    ex = get_execution(uid, check_inputs=False, current_user=current_user).entity # checks perms already
     if ex.Outputs:
         res = db.IOData.find_one({'_id': bson.objectid.ObjectId(ex.Outputs)})
         if res is None:
@@ -1466,7 +1857,7 @@ def get_execution_outputs_with_edm(uid: str, current_user: User_Model = Depends(
 
 @api_router.get("/executions/{uid}/livelog/{num}", tags=["Executions"])
 def get_execution_livelog(uid: str, num: int, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[str]:
-    ex = get_execution(uid, current_user=current_user).entity
+    ex = get_execution(uid, check_inputs=False, current_user=current_user).entity
     if ex.loggerURI is not None:
         import Pyro5.api
         import serpent
@@ -1482,41 +1873,85 @@ def get_execution_livelog(uid: str, num: int, current_user: User_Model = Depends
     return []
 
 
-def get_execution_io_item(uid: str, name, obj_id: str, inputs: bool, current_user: User_Model) -> models.IODataRecordItem_Model:
-    ex = get_execution(uid, current_user=current_user).entity
+# Workflow log is streamed by the scheduler in chunks while the execution runs (numbered by seq from 0, so that
+# resending a chunk after failure is harmless); the complete log is stored in GridFS (ExecutionLog) once finished, and the
+# chunks are removed when ExecutionLog is set.
+
+class M_ExecutionLogChunk(BaseModel):
+    seq: int
+    data: str
+
+@api_router.post("/executions/{uid}/log_chunks", tags=["Executions"])
+async def append_execution_log_chunk(uid: str, data: M_ExecutionLogChunk, current_user: User_Model = Depends(get_current_authenticated_user)) -> int:
+    perms.TODO()
+    try: await adb.ExecutionLogChunks.insert_one({'execution': uid, 'seq': data.seq, 'data': data.data, 'createdAt': datetime.now(timezone.utc)})
+    except pymongo.errors.DuplicateKeyError: pass
+    return data.seq
+
+class M_ExecutionLog(BaseModel):
+    data: str
+    next: int
+
+@api_router.get("/executions/{uid}/log_chunks", tags=["Executions"])
+async def get_execution_log_chunks(uid: str, since: int = 0, current_user: User_Model = Depends(get_current_authenticated_user)) -> M_ExecutionLog:
+    """
+    Log of the execution, streamed so far, starting with chunk *since*; pass the returned *next* as *since* to get only the new part.
+    """
+    perms.TODO()
+    data, seq = [], since
+    async for c in adb.ExecutionLogChunks.find({'execution': uid, 'seq': {'$gte': since}}, {'_id': 0, 'seq': 1, 'data': 1}).sort('seq', ASCENDING):
+        # stop at a missing chunk (not yet received), to be re-read next time
+        if c['seq'] != seq: break
+        data.append(c['data'])
+        seq += 1
+    return M_ExecutionLog(data=''.join(data), next=seq)
+
+
+async def _execution_io_ref(uid: str, perm: _PermWhat) -> models.WorkflowExecution_Model:
+    'Only the fields of execution *uid* needed to access its IOData items (unvalidated), with *perm* checked.'
+    res = await adb.WorkflowExecutions.find_one({"_id": bson.objectid.ObjectId(uid)}, {'Inputs': 1, 'Outputs': 1, 'Status': 1, 'RequestedBy': 1, 'UseCase': 1})
+    if res is None: raise NotFoundError(f'Database reports no execution with uid={uid}.')
+    return perms.ensure(models.WorkflowExecution_Model.model_construct(**{k: v for k, v in res.items() if k != '_id'}, dbID=uid), perm=perm)
+
+
+def _io_item_match(name: str, obj_id: str) -> dict:
+    'Condition on one DataSet item with *name* and (scalar) *obj_id*.'
+    # a plain {'ObjID': obj_id} would also match arrays containing obj_id
+    return {'Name': name, 'ObjID': {('$in' if obj_id == '' else '$eq'): (['', None] if obj_id == '' else str(obj_id)), '$not': {'$type': 'array'}}}
+
+
+async def get_execution_io_item(uid: str, name, obj_id: str, inputs: bool, current_user: User_Model) -> models.IODataRecordItem_Model:
+    ex = await _execution_io_ref(uid, perm='read')
     data_id = ex.Inputs if inputs else ex.Outputs
-    res = db.IOData.find_one({'_id': bson.objectid.ObjectId(data_id)})
+    # only the matching item is returned
+    res = await adb.IOData.find_one({'_id': bson.objectid.ObjectId(data_id)}, {'DataSet': {'$elemMatch': _io_item_match(name, obj_id)}})
     if res is None: raise NotFoundError(f'Database reports no IOData with uid={data_id}.')
-
-    data = models.IODataRecord_Model.model_validate(res)
-    for elem in data.DataSet:
-        if elem.Name == name and elem.ObjID == obj_id:
-            return elem
-    raise NotFoundError(f'Execution weid={uid}, {"inputs" if inputs else "outputs"}: no element with name="{name}" & obj_id="{obj_id}".')
+    if not res.get('DataSet'): raise NotFoundError(f'Execution weid={uid}, {"inputs" if inputs else "outputs"}: no element with name="{name}" & obj_id="{obj_id}".')
+    return models.IODataRecordItem_Model.model_validate(res['DataSet'][0])
 
 
 @api_router.get("/executions/{uid}/input_item/{name}/{obj_id}", tags=["Executions"])
-def get_execution_input_item(uid: str, name: str, obj_id: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
-    return get_execution_io_item(uid, name, obj_id, inputs=True, current_user=current_user)
+async def get_execution_input_item(uid: str, name: str, obj_id: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
+    return await get_execution_io_item(uid, name, obj_id, inputs=True, current_user=current_user)
 
 
 @api_router.get("/executions/{uid}/output_item/{name}/{obj_id}", tags=["Executions"])
-def get_execution_output_item(uid: str, name: str, obj_id: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
-    return get_execution_io_item(uid, name, obj_id, inputs=False, current_user=current_user)
+async def get_execution_output_item(uid: str, name: str, obj_id: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
+    return await get_execution_io_item(uid, name, obj_id, inputs=False, current_user=current_user)
 
 
 @api_router.get("/executions/{uid}/input_item/{name}", tags=["Executions"], include_in_schema=False)
 @api_router.get("/executions/{uid}/input_item/{name}/", tags=["Executions"], include_in_schema=False)
 @api_router.get("/executions/{uid}/input_item/{name}//", tags=["Executions"], include_in_schema=False)
-def _get_execution_input_item(uid: str, name: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
-    return get_execution_io_item(uid, name, '', inputs=True, current_user=current_user)
+async def _get_execution_input_item(uid: str, name: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
+    return await get_execution_io_item(uid, name, '', inputs=True, current_user=current_user)
 
 
 @api_router.get("/executions/{uid}/output_item/{name}", tags=["Executions"], include_in_schema=False)
 @api_router.get("/executions/{uid}/output_item/{name}/", tags=["Executions"], include_in_schema=False)
 @api_router.get("/executions/{uid}/output_item/{name}//", tags=["Executions"], include_in_schema=False)
-def _get_execution_output_item(uid: str, name: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
-    return get_execution_io_item(uid, name, '', inputs=False, current_user=current_user)
+async def _get_execution_output_item(uid: str, name: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> models.IODataRecordItem_Model:
+    return await get_execution_io_item(uid, name, '', inputs=False, current_user=current_user)
 
 
 
@@ -1525,46 +1960,45 @@ class M_IODataSetContainer(BaseModel):
     object: typing.Optional[dict] = None
 
 # FIXME: validation
-def set_execution_io_item(uid: str, name: str, obj_id: str, inputs: bool, data_container: M_IODataSetContainer, current_user: User_Model):
-    we = get_execution(uid, current_user=current_user).entity
-    perms.ensure(we,perm='modify',on='self')
+async def set_execution_io_item(uid: str, name: str, obj_id: str, inputs: bool, data_container: M_IODataSetContainer, current_user: User_Model):
+    we = await _execution_io_ref(uid, perm='modify')
     if (we.Status == 'Created' and inputs==True) or (we.Status == 'Running' and inputs==False):
-        with db_transaction() as session:
-            _id=we.Inputs if inputs else we.Outputs
-            id_condition = {'_id': bson.objectid.ObjectId(_id)}
-            if data_container.link is not None and inputs==True:
-                rec = db.IOData.find_one_and_update(id_condition, {'$set': {"DataSet.$[r].Link": data_container.link}}, array_filters=[{"r.Name": name, "r.ObjID": str(obj_id)}], return_document=ReturnDocument.AFTER, session=session)
-            elif data_container.object is not None:
-                rec = db.IOData.find_one_and_update(id_condition, {'$set': {"DataSet.$[r].Object": data_container.object}}, array_filters=[{"r.Name": name, "r.ObjID": str(obj_id)}], return_document=ReturnDocument.AFTER, session=session)
-            else: return False # raise exception??
-            if rec is None: raise NotFoundError(f'Database reports no IOData with {_id=}.')
-            models.IODataRecord_Model.model_validate(rec)  # if not validated, transaction is aborted
-            return True
+        _id=we.Inputs if inputs else we.Outputs
+        id_condition = {'_id': bson.objectid.ObjectId(_id)}
+        match = _io_item_match(name, obj_id)
+        if data_container.link is not None and inputs==True: update = {"DataSet.$[r].Link": data_container.link}
+        elif data_container.object is not None: update = {"DataSet.$[r].Object": data_container.object}
+        else: return False # raise exception??
+        rec = await adb.IOData.find_one_and_update(id_condition, {'$set': update}, array_filters=[{'r.'+k: v for k, v in match.items()}], projection={'DataSet': {'$elemMatch': match}}, return_document=ReturnDocument.AFTER)
+        if rec is None: raise NotFoundError(f'Database reports no IOData with {_id=}.')
+        # validate the modified item
+        for item in rec.get('DataSet', []): models.IODataRecordItem_Model.model_validate(item)
+        return True
     return False
 
 
 @api_router.patch("/executions/{uid}/input_item/{name}/{obj_id}", tags=["Executions"])
-def set_execution_input_item(uid: str, name: str, obj_id: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
-    return set_execution_io_item(uid, name, obj_id, True, data, current_user)
+async def set_execution_input_item(uid: str, name: str, obj_id: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
+    return await set_execution_io_item(uid, name, obj_id, True, data, current_user)
 
 
 @api_router.patch("/executions/{uid}/output_item/{name}/{obj_id}", tags=["Executions"])
-def set_execution_output_item(uid: str, name: str, obj_id: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
-    return set_execution_io_item(uid, name, obj_id, False, data, current_user)
+async def set_execution_output_item(uid: str, name: str, obj_id: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
+    return await set_execution_io_item(uid, name, obj_id, False, data, current_user)
 
 
 @api_router.patch("/executions/{uid}/input_item/{name}", tags=["Executions"], include_in_schema=False)
 @api_router.patch("/executions/{uid}/input_item/{name}/", tags=["Executions"], include_in_schema=False)
 @api_router.patch("/executions/{uid}/input_item/{name}//", tags=["Executions"], include_in_schema=False)
-def _set_execution_input_item(uid: str, name: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
-    return set_execution_io_item(uid, name, '', True, data, current_user)
+async def _set_execution_input_item(uid: str, name: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
+    return await set_execution_io_item(uid, name, '', True, data, current_user)
 
 
 @api_router.patch("/executions/{uid}/output_item/{name}", tags=["Executions"], include_in_schema=False)
 @api_router.patch("/executions/{uid}/output_item/{name}/", tags=["Executions"], include_in_schema=False)
 @api_router.patch("/executions/{uid}/output_item/{name}//", tags=["Executions"], include_in_schema=False)
-def _set_execution_output_item(uid: str, name: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
-    return set_execution_io_item(uid, name, '', False, data, current_user)
+async def _set_execution_output_item(uid: str, name: str, data: M_IODataSetContainer, current_user: User_Model = Depends(get_current_authenticated_user)):
+    return await set_execution_io_item(uid, name, '', False, data, current_user)
 
 
 def ObjIDIsIterable(val):
@@ -1672,11 +2106,12 @@ def checkInput(execution, name, obj_id, object_type, data_id, edm_path=None, edm
 
 @api_router.get("/executions/{uid}/check_inputs", tags=["Executions"], response_model=bool)
 def check_execution_inputs(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)) -> bool:
-    execution = get_execution_with_inputs(uid, current_user=current_user).entity
-    workflow = get_workflow_by_version_inside(execution.WorkflowID, execution.WorkflowVersion)
-    if workflow is None:
+    return _check_execution_inputs(get_execution_with_inputs(uid, current_user=current_user).entity)
+
+def _check_execution_inputs(execution: models.WorkflowExecution_Model) -> bool:
+    'Whether all compulsory inputs of *execution* (with InputsData, as returned by _execution_lookup) are set.'
+    if execution.workflow is None:
         raise RuntimeError('Workflow for execution not found.')
-    workflow_input_templates = workflow.IOCard.Inputs
     execution_inputs = execution.InputsData
     if execution_inputs is None:
         raise RuntimeError('Execution inputs data not found.')
@@ -1746,65 +2181,280 @@ def modify_execution_ids(uid: str, data: M_ModifyExecutionOntoBaseObjectIDs, cur
     return get_execution(uid, current_user=current_user)
 
 
+def _status_transition_fields(status: str, now: str) -> dict[str, Any]:
+    'Fields set when an execution changes to *status* (from a different one) at *now* (isoformat).'
+    return {
+        'Created':   {'SubmittedDate': None, 'ScheduledDate': None, 'StartDate': None, 'EndDate': None, 'ExecutionLog': None, 'SchedulerID': None, 'LeaseExpiresAt': None, 'NextAttemptAt': None, 'InputsHash': None, 'CachedFrom': None},
+        'Blocked':   {'SubmittedDate': None, 'ScheduledDate': None, 'StartDate': None, 'EndDate': None, 'ExecutionLog': None, 'SchedulerID': None, 'LeaseExpiresAt': None, 'NextAttemptAt': None, 'InputsHash': None, 'CachedFrom': None},
+        'Pending':   {'SubmittedDate': now, 'ScheduledDate': None, 'StartDate': None, 'EndDate': None, 'ExecutionLog': None, 'SchedulerID': None, 'LeaseExpiresAt': None, 'NextAttemptAt': None},
+        'Scheduled': {'ScheduledDate': now, 'StartDate': None, 'EndDate': None, 'ExecutionLog': None},
+        'Running':   {'StartDate': now, 'EndDate': None, 'ExecutionLog': None},
+        'Finished':  {'EndDate': now, 'LeaseExpiresAt': None},
+        'Failed':    {'EndDate': now, 'LeaseExpiresAt': None},
+    }[status]
+
+def _status_transition_done(uid: str, status: str, prev: dict, session=None) -> None:
+    'Side effects of the execution *uid* changing to *status*; *prev* is the record before the change.'
+    if status in ('Created', 'Blocked', 'Pending'): db.ExecutionLogChunks.delete_many({'execution': uid}, session=session)
+    if status in ('Finished', 'Failed'): _fairshare_charge(prev | {'EndDate': datetime.now().isoformat()})
+    if status == 'Finished': _unblock_executions({'DependsOn': uid}, session=session)
+    if status == 'Pending': _result_cache_apply(uid, session=session)
+
+
+# Executions may depend on others: their inputs can be linked (Link.ExecID) to outputs of upstream executions. An execution
+# scheduled before all its upstream executions are Finished waits as Blocked (with their IDs in DependsOn) and is promoted
+# to Pending when the last of them finishes. Failed upstream execution leaves it Blocked (until re-run, or reset to Created).
+def _execution_upstream(rec: dict) -> List[str]:
+    'IDs of executions whose outputs are linked from inputs of the execution *rec*.'
+    if not rec.get('Inputs'): return []
+    io = db.IOData.find_one({'_id': bson.objectid.ObjectId(rec['Inputs'])}, {'DataSet.Link.ExecID': 1})
+    ids = {(item.get('Link') or {}).get('ExecID') for item in (io or {}).get('DataSet', [])}
+    return sorted(i for i in ids if i and i != str(rec['_id']))
+
+def _unblock_executions(query: dict, session=None) -> int:
+    'Promote Blocked executions matching *query* whose upstream executions are all Finished to Pending; return their number.'
+    n = 0
+    for rec in db.WorkflowExecutions.find({'Status': 'Blocked'} | query, {'DependsOn': 1}, session=session):
+        deps = {bson.objectid.ObjectId(i) for i in rec.get('DependsOn', [])}
+        if db.WorkflowExecutions.count_documents({'_id': {'$in': list(deps)}, 'Status': 'Finished'}, session=session) < len(deps): continue
+        # conditional on Blocked: the last two upstream executions finishing at the same time may both get here
+        res = db.WorkflowExecutions.update_one({'_id': rec['_id'], 'Status': 'Blocked'}, {'$set': {'Status': 'Pending'} | _status_transition_fields('Pending', datetime.now().isoformat())}, session=session)
+        if res.modified_count: _result_cache_apply(str(rec['_id']), session=session)
+        n += res.modified_count
+    if n: log.info(f'{n} blocked execution(s) promoted to Pending.')
+    return n
+
+
+class M_ExecutionTransition(BaseModel):
+    id: str
+    Status: Optional[models.ExecutionStatus_Literal] = None
+    # fields which may be set and incremented (other ones only through their dedicated endpoints); Priority is clamped as in set_param
+    set: dict[Literal['ExecutionLog', 'Priority', 'label'], Any] = {}
+    inc: dict[Literal['Attempts'], int] = {}
+    # notify the requesting user about the new status: if it changed (True), or also when it was already set before ('always')
+    notify: bool|Literal['always'] = False
+    # apply only if the execution currently has these values (compare-and-set), e.g. Status and SchedulerID of the owner
+    expect: dict[Literal['Status', 'SchedulerID'], Optional[str]] = {}
+
+@api_router.patch("/executions/transition", tags=["Executions"])
+def transition_executions(data: List[M_ExecutionTransition], current_user: User_Model = Depends(get_current_authenticated_user)) -> List[bool]:
+    """
+    Apply changes to one or more executions, each in a single atomic update: change of Status (with the same side effects
+    as set_param, such as setting dates, applied only if the status actually changes), fields to set and fields to increment;
+    optionally queue notification of the requesting user about the status change (or about the status regardless of change,
+    with notify='always'). With *expect*, the change is applied only if the execution has the expected values. Returns for
+    each item whether the execution was found (and matched *expect*).
+    """
+    perms.TODO()
+    now = datetime.now().isoformat()
+    ret = []
+    for t in data:
+        if 'Priority' in t.set: t.set['Priority'] = _execution_priority(int(t.set['Priority']), current_user)
+        sets: dict[str, Any] = {k: {'$literal': v} for k, v in t.set.items()}
+        # counters may be stored as strings (Attempts, by older clients)
+        sets |= {k: {'$add': [{'$convert': {'input': f'${k}', 'to': 'int', 'onError': 0, 'onNull': 0}}, n]} for k, n in t.inc.items()}
+        if t.Status is not None:
+            changed = {'$ne': ['$Status', t.Status]}
+            sets |= {k: {'$cond': [changed, {'$literal': v}, f'${k}']} for k, v in _status_transition_fields(t.Status, now).items() if k not in sets}
+            sets['Status'] = t.Status
+        prev = db.WorkflowExecutions.find_one_and_update({'_id': bson.objectid.ObjectId(t.id)} | t.expect, [{'$set': sets}], projection={'Status': 1, 'StartDate': 1, 'RequestedBy': 1, 'UseCase': 1, 'WorkflowID': 1, 'WorkflowVersion': 1})
+        if prev is not None and t.Status is not None:
+            statusChanged = (prev.get('Status') != t.Status)
+            if statusChanged: _status_transition_done(t.id, t.Status, prev)
+            if (t.notify and statusChanged) or t.notify == 'always': _notify_execution_status(prev | {'Status': t.Status})
+        # the complete log is stored now, live log chunks are not needed anymore
+        if prev is not None and t.set.get('ExecutionLog'): db.ExecutionLogChunks.delete_many({'execution': t.id})
+        ret.append(prev is not None)
+    return ret
+
+
+# Result cache: for workflows with CacheResults, a fingerprint of inputs (InputsHash) is computed when an execution becomes
+# Pending; if a Finished execution of the same workflow version has the same fingerprint, its outputs are copied (stored
+# files are shared, not duplicated) and the execution is marked Finished without being dispatched. The fingerprint covers
+# values, content hashes of stored files, linked outputs of upstream executions and values resolved from the EDM.
+# Executions writing outputs to the EDM are never served from the cache, as their outputs are not in IOData.
+class _Unhashable(Exception): pass
+
+def _gridfs_sha256(fid: str, session=None) -> str:
+    'Content hash of a GridFS file, computed once and stored with it.'
+    rec = db['fs.files'].find_one({'_id': bson.objectid.ObjectId(fid)}, {'sha256': 1}, session=session)
+    if rec is None: raise _Unhashable(f'Missing file {fid}.')
+    if 'sha256' not in rec:
+        h = hashlib.sha256()
+        f = gridfs.GridFS(db).get(rec['_id'], session=session)
+        while (buf := f.read(1 << 20)): h.update(buf)
+        rec['sha256'] = h.hexdigest()
+        db['fs.files'].update_one({'_id': rec['_id']}, {'$set': {'sha256': rec['sha256']}}, session=session)
+    return rec['sha256']
+
+def _iodata_item_value(item: dict, ex: dict, session=None, depth: int = 0) -> Any:
+    'Canonical value of the IOData *item* of execution *ex*, with links and EDM paths resolved and files replaced by hashes.'
+    link = item.get('Link') or {}
+    if link.get('ExecID') and link.get('Name'):
+        if depth > 10: raise _Unhashable('Link chain too long.')
+        up = db.WorkflowExecutions.find_one({'_id': bson.objectid.ObjectId(link['ExecID'])}, {'Outputs': 1, 'EDMMapping': 1}, session=session)
+        out = db.IOData.find_one({'_id': bson.objectid.ObjectId(up['Outputs'])}, session=session) if up and up.get('Outputs') else None
+        linked = next((it for it in (out or {}).get('DataSet', []) if it.get('Name') == link['Name'] and (it.get('ObjID') or '') == (link.get('ObjID') or '')), None)
+        if linked is None: raise _Unhashable(f'Unresolved link {link}.')
+        return _iodata_item_value(linked, up, session=session, depth=depth+1)
+    if item.get('EDMPath'):
+        base, path = item['EDMPath'].split('.', 1)
+        info = next((m for m in ex.get('EDMMapping') or [] if m.get('Name') == base), None)
+        if info is None or not info.get('id'): raise _Unhashable(f'Unresolved EDM path {item["EDMPath"]}.')
+        return {'EDM': dms_api_path_get(db=info['DBName'], type=info['EDMEntity'], id=info['id'], path=path, meta=False)}
+    obj = dict(item.get('Object') or {})
+    if obj.get('FileID'): obj['FileID'] = _gridfs_sha256(obj['FileID'], session=session)
+    return {'Value': item.get('Value'), 'Object': obj, 'FileID': _gridfs_sha256(item['FileID'], session=session) if item.get('FileID') else None}
+
+def _inputs_hash(ex: dict, session=None) -> str:
+    inp = db.IOData.find_one({'_id': bson.objectid.ObjectId(ex['Inputs'])}, session=session) if ex.get('Inputs') else None
+    items = [[it.get('Name'), it.get('ObjID'), it.get('Type'), it.get('Type_ID', it.get('TypeID')), it.get('Units'), _iodata_item_value(it, ex, session=session)] for it in (inp or {}).get('DataSet', [])]
+    items.sort(key=lambda i: json.dumps(i[:2], default=str))
+    return hashlib.sha256(json.dumps(items, sort_keys=True, default=str).encode()).hexdigest()
+
+def _result_cache_apply(uid: str, session=None) -> bool:
+    'Finish the Pending execution *uid* with outputs of an earlier one with identical inputs, if its workflow allows that; return whether it did.'
+    try:
+        ex = db.WorkflowExecutions.find_one({'_id': bson.objectid.ObjectId(uid)}, session=session)
+        if ex is None or ex.get('Status') != 'Pending' or ex.get('InputsHash') is not None: return False
+        wf = get_workflow_by_version_inside(ex['WorkflowID'], ex['WorkflowVersion'])
+        if wf is None or not wf.CacheResults: return False
+        if ex.get('EDMMapping') and any(o.EDMPath for o in wf.IOCard.Outputs): return False
+        inputsHash = _inputs_hash(ex, session=session)
+        db.WorkflowExecutions.update_one({'_id': ex['_id']}, {'$set': {'InputsHash': inputsHash}}, session=session)
+        src = db.WorkflowExecutions.find_one({'InputsHash': inputsHash, 'Status': 'Finished', 'WorkflowID': ex['WorkflowID'], 'WorkflowVersion': ex['WorkflowVersion']}, {'Outputs': 1}, sort=[('EndDate', DESCENDING)], session=session)
+        if src is None: return False
+        now = datetime.now().isoformat()
+        # only if not claimed by a scheduler meanwhile
+        prev = db.WorkflowExecutions.find_one_and_update({'_id': ex['_id'], 'Status': 'Pending'}, {'$set': _status_transition_fields('Finished', now) | {'Status': 'Finished', 'StartDate': now, 'CachedFrom': str(src['_id'])}}, session=session)
+        if prev is None: return False
+        srcOut = db.IOData.find_one({'_id': bson.objectid.ObjectId(src['Outputs'])}, {'DataSet': 1}, session=session) if src.get('Outputs') else None
+        if srcOut is not None and ex.get('Outputs'): db.IOData.update_one({'_id': bson.objectid.ObjectId(ex['Outputs'])}, {'$set': {'DataSet': srcOut['DataSet']}}, session=session)
+        log.info(f'Execution {uid} finished with cached outputs of {src["_id"]}.')
+        _status_transition_done(uid, 'Finished', prev | {'StartDate': now}, session=session)
+        _notify_execution_status(prev | {'Status': 'Finished'})
+        return True
+    except _Unhashable as e:
+        log.info(f'Inputs of execution {uid} cannot be fingerprinted, result cache not used: {e}')
+    except Exception:
+        log.exception(f'Result cache lookup for execution {uid} failed.')
+    return False
+
+
+# Notifications (e-mails) are not sent by the API or the scheduler directly, but queued in the Notifications collection;
+# a worker (my_email.NotificationWorker, running in the scheduler) claims due ones with a lease, sends them over a reused
+# SMTP connection and reports back; failed ones are retried with exponential backoff. With MUPIFDB_NOTIFY_DIGEST_SEC > 0,
+# notifications are held for that long and those to the same recipient are sent as one message (digest).
+NOTIFY_DIGEST_SEC = float(os.environ.get('MUPIFDB_NOTIFY_DIGEST_SEC', '0'))
+NOTIFY_MAX_ATTEMPTS = 10
+
+def _notification_enqueue(to: str, subject: str, text: str) -> str:
+    now = datetime.now(timezone.utc)
+    due = now + timedelta(seconds=NOTIFY_DIGEST_SEC)
+    if NOTIFY_DIGEST_SEC > 0:
+        # join the digest already waiting for the recipient
+        other = db.Notifications.find_one({'to': to, 'Status': 'queued', 'Attempts': 0}, {'NextAttemptAt': 1}, sort=[('NextAttemptAt', ASCENDING)])
+        if other is not None: due = other['NextAttemptAt']
+    res = db.Notifications.insert_one({'to': to, 'subject': subject, 'text': text, 'Status': 'queued', 'Attempts': 0, 'CreatedAt': now, 'NextAttemptAt': due})
+    return str(res.inserted_id)
+
+def _notify_execution_status(rec: dict) -> None:
+    'Queue notification of the user who requested the execution *rec* about its (new) status.'
+    webUrl = (db.Settings.find_one() or {}).get('webUrl', '')
+    if not rec.get('RequestedBy') or not webUrl: return
+    text = f'Your execution of workflow "{rec.get("WorkflowID")}" (v{rec.get("WorkflowVersion")}) is now in Status "{rec["Status"]}". You can view its detail here: {webUrl}/executions/{rec["_id"]}'
+    if rec['Status'] == 'Created':
+        text += ' It has probably reached the limit of attempts for execution while some resources were not available.'
+    _notification_enqueue(rec['RequestedBy'], 'MuPIF DB execution info', text)
+
+
+@api_router.post("/executions/{uid}/notify", tags=["Executions"])
+def notify_execution(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)):
+    'Queue notification of the requesting user about the current status of the execution.'
+    perms.TODO()
+    rec = db.WorkflowExecutions.find_one({'_id': bson.objectid.ObjectId(uid)}, {'Status': 1, 'RequestedBy': 1, 'WorkflowID': 1, 'WorkflowVersion': 1})
+    if rec is None: raise NotFoundError(f'Execution with uid={uid} not found.')
+    _notify_execution_status(rec)
+
+
+class M_Notification(BaseModel):
+    to: str
+    subject: str
+    text: str
+
+@api_router.post("/notifications", tags=["Notifications"])
+def insert_notification(data: M_Notification, current_user: User_Model = Depends(get_current_authenticated_user)) -> str:
+    perms.TODO()
+    return _notification_enqueue(data.to, data.subject, data.text)
+
+
+class M_ClaimNotifications(BaseModel):
+    workerID: str
+    limit: int = 100
+    leaseSec: float = 300.
+
+@api_router.patch("/notifications/claim", tags=["Notifications"])
+def claim_notifications(data: M_ClaimNotifications, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[dict]:
+    '''
+    Claim notifications due to be sent (including those claimed by a worker which did not report back within the lease).
+    Returns them as dicts with id, to, subject, text.
+    '''
+    perms.TODO()
+    now = datetime.now(timezone.utc)
+    due = {'$or': [{'Status': 'queued', 'NextAttemptAt': {'$lte': now}}, {'Status': 'sending', 'LeaseExpiresAt': {'$lte': now}}]}
+    ids = [r['_id'] for r in db.Notifications.find(due, {'_id': 1}, sort=[('NextAttemptAt', ASCENDING)], limit=data.limit)]
+    if not ids: return []
+    token = str(bson.objectid.ObjectId())
+    # those claimed by another worker meanwhile no longer match *due*
+    db.Notifications.update_many({'_id': {'$in': ids}} | due, {'$set': {'Status': 'sending', 'ClaimedBy': data.workerID, 'ClaimToken': token, 'LeaseExpiresAt': now + timedelta(seconds=data.leaseSec)}})
+    return [dict(id=str(r['_id']), to=r['to'], subject=r['subject'], text=r['text']) for r in db.Notifications.find({'ClaimToken': token}, sort=[('CreatedAt', ASCENDING)])]
+
+
+class M_NotificationsDone(BaseModel):
+    sent: List[str] = []
+    failed: List[str] = []
+    baseSec: float = 60.
+    maxSec: float = 3600.
+
+@api_router.patch("/notifications/done", tags=["Notifications"])
+def notifications_done(data: M_NotificationsDone, current_user: User_Model = Depends(get_current_authenticated_user)):
+    'Mark claimed notifications as sent, or failed: those are retried after baseSec*2**attempts (at most maxSec), NOTIFY_MAX_ATTEMPTS times.'
+    perms.TODO()
+    now = datetime.now(timezone.utc)
+    if data.sent:
+        db.Notifications.update_many({'_id': {'$in': [bson.objectid.ObjectId(i) for i in data.sent]}}, {'$set': {'Status': 'sent', 'SentAt': now, 'LeaseExpiresAt': None}})
+    if data.failed:
+        attempts = {'$add': ['$Attempts', 1]}
+        delay = {'$min': [data.maxSec, {'$multiply': [data.baseSec, {'$pow': [2, '$Attempts']}]}]}
+        db.Notifications.update_many({'_id': {'$in': [bson.objectid.ObjectId(i) for i in data.failed]}}, [{'$set': {
+            'Status': {'$cond': [{'$gte': [attempts, NOTIFY_MAX_ATTEMPTS]}, 'failed', 'queued']},
+            'NextAttemptAt': {'$add': [now, {'$multiply': [delay, 1000]}]},
+            'Attempts': attempts,
+            'LeaseExpiresAt': None,
+        }}])
+
+
 class M_ModifyExecution(BaseModel):
     key: str
-    value: str
+    value: str|int
 
 @api_router.patch("/executions/{uid}/set_param", tags=["Executions"])
 def modify_execution_set_param(uid: str, data: M_ModifyExecution, current_user: User_Model = Depends(get_current_authenticated_user)):
     perms.TODO()
     with db_transaction() as session:
-        if data.key == 'Status':
-            if data.value == 'Created':
-                db.WorkflowExecutions.find_one_and_update(
-                    {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
-                    {"$set": {
-                        'SubmittedDate': None,
-                        'ScheduledDate': None,
-                        'StartDate': None,
-                        'EndDate': None,
-                        'ExecutionLog': None
-                    }},
-                    session=session)
-            if data.value == 'Pending':
-                # todo check if all inputs are set
-                db.WorkflowExecutions.find_one_and_update(
-                    {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
-                    {"$set": {
-                        'SubmittedDate': datetime.now().isoformat(),
-                        'ScheduledDate': None,
-                        'StartDate': None,
-                        'EndDate': None,
-                        'ExecutionLog': None
-                    }},
-                    session=session)
-            if data.value == 'Scheduled':
-                db.WorkflowExecutions.find_one_and_update(
-                    {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
-                    {"$set": {
-                        'ScheduledDate': datetime.now().isoformat(),
-                        'StartDate': None,
-                        'EndDate': None,
-                        'ExecutionLog': None
-                    }},
-                    session=session)
-            if data.value == 'Running':
-                db.WorkflowExecutions.find_one_and_update(
-                    {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
-                    {"$set": {
-                        'StartDate': datetime.now().isoformat(),
-                        'EndDate': None,
-                        'ExecutionLog': None
-                    }},
-                    session=session)
-            if data.value in ('Finished','Failed'):
-                db.WorkflowExecutions.find_one_and_update(
-                    {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
-                    {"$set": {
-                        'EndDate': datetime.now().isoformat()
-                    }},
-                    session=session)
-        rec = db.WorkflowExecutions.find_one_and_update({'_id': bson.objectid.ObjectId(uid)}, {"$set": {data.key: data.value}}, return_document=ReturnDocument.AFTER, session=session)
+        if data.key == 'Status' and data.value in models.ExecutionStatus_Literal.__args__:
+            # todo check if all inputs are set (Pending)
+            # status is written together with the transition fields, so that side effects (unblocking dependent
+            # executions, result cache) see the new status; they may change it further (cached result -> Finished)
+            prev = db.WorkflowExecutions.find_one_and_update(
+                {'_id': bson.objectid.ObjectId(uid), 'Status': {'$ne': data.value}},
+                {"$set": _status_transition_fields(data.value, datetime.now().isoformat()) | {'Status': data.value}},
+                session=session)
+            if prev is not None: _status_transition_done(uid, data.value, prev, session=session)
+            rec = db.WorkflowExecutions.find_one({'_id': bson.objectid.ObjectId(uid)}, session=session)
+        else:
+            if data.key == 'Priority': data.value = _execution_priority(int(data.value), current_user)
+            rec = db.WorkflowExecutions.find_one_and_update({'_id': bson.objectid.ObjectId(uid)}, {"$set": {data.key: data.value}}, return_document=ReturnDocument.AFTER, session=session)
         if rec is None: raise NotFoundError(f'Execution with uid={uid} not found for update.')
         models.WorkflowExecution_Model.model_validate(rec)
     return get_execution(uid, current_user=current_user)
@@ -1812,12 +2462,123 @@ def modify_execution_set_param(uid: str, data: M_ModifyExecution, current_user:
 
 @api_router.patch("/executions/{uid}/schedule", tags=["Executions"])
 def schedule_execution(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)):
-    execution_record = perms.ensure(get_execution(uid, current_user=current_user).entity, perm='modify')
-    if execution_record.Status == 'Created' or True:
-        data = type('', (), {})()
-        mod=M_ModifyExecution(key = "Status",value = "Pending")
-        return modify_execution_set_param(uid, mod, current_user=current_user)
-    return None
+    '''
+    Submit the execution: set it Pending, or Blocked if some of its upstream executions (see _execution_upstream) are not
+    Finished yet.
+    '''
+    execution_record = perms.ensure(get_execution(uid, check_inputs=False, current_user=current_user).entity, perm='modify')
+    deps = _execution_upstream(db.WorkflowExecutions.find_one({'_id': bson.objectid.ObjectId(uid)}, {'Inputs': 1}) or {})
+    db.WorkflowExecutions.update_one({'_id': bson.objectid.ObjectId(uid)}, {'$set': {'DependsOn': deps}})
+    if not deps:
+        return modify_execution_set_param(uid, M_ModifyExecution(key='Status', value='Pending'), current_user=current_user)
+    ret = modify_execution_set_param(uid, M_ModifyExecution(key='Status', value='Blocked'), current_user=current_user)
+    # the last upstream execution may have finished before it could see this one Blocked
+    if _unblock_executions({'_id': bson.objectid.ObjectId(uid)}): ret = get_execution(uid, current_user=current_user)
+    return ret
+
+
+class M_DeferExecution(BaseModel):
+    baseSec: float = 30.
+    maxSec: float = 3600.
+
+@api_router.patch("/executions/{uid}/defer", tags=["Executions"])
+def defer_execution(uid: str, data: M_DeferExecution, current_user: User_Model = Depends(get_current_authenticated_user)) -> int:
+    """
+    Postpone the next dispatch attempt of a Pending execution with exponential backoff: increment Attempts and set
+    NextAttemptAt to now + min(maxSec, baseSec*2**(Attempts-1)). Return the new number of attempts.
+    """
+    perms.TODO()
+    now = datetime.now(timezone.utc)
+    rec = db.WorkflowExecutions.find_one_and_update(
+        {'_id': bson.objectid.ObjectId(uid), 'Status': 'Pending'},
+        [
+            # Attempts may be stored as a string (older clients)
+            {'$set': {'Attempts': {'$add': [{'$convert': {'input': '$Attempts', 'to': 'int', 'onError': 0, 'onNull': 0}}, 1]}}},
+            {'$set': {'NextAttemptAt': {'$add': [now, {'$multiply': [1000, {'$min': [data.maxSec, {'$multiply': [data.baseSec, {'$pow': [2, {'$subtract': ['$Attempts', 1]}]}]}]}]}]}}},
+        ],
+        projection={'Attempts': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if rec is None: raise NotFoundError(f'No Pending execution with uid={uid}.')
+    return rec['Attempts']
+
+
+# --------------------------------------------------
+# Scheduler leases
+# --------------------------------------------------
+# Several scheduler instances may run against one database. A scheduler claims a Pending execution atomically
+# (Pending -> Scheduled), recording its ID and lease expiry; it then keeps extending the lease (heartbeat) while the
+# execution is queued or running. Executions whose lease expired (the scheduler died) are reclaimed by any scheduler.
+
+class M_ClaimExecution(BaseModel):
+    schedulerID: str
+    leaseSec: float = 120.
+    # claim an execution left Scheduled without owner (by a scheduler predating leases) instead of a Pending one
+    unowned: bool = False
+
+@api_router.patch("/executions/{uid}/claim", tags=["Executions"])
+async def claim_execution(uid: str, data: M_ClaimExecution, current_user: User_Model = Depends(get_current_authenticated_user)) -> bool:
+    '''
+    Atomically move the execution from Pending to Scheduled, owned by *schedulerID*. Return False if not Pending (claimed
+    by someone else). With *unowned*, take over a Scheduled execution without SchedulerID instead.
+    '''
+    perms.TODO()
+    now = datetime.now(timezone.utc)
+    if data.unowned:
+        rec = await adb.WorkflowExecutions.find_one_and_update(
+            {'_id': bson.objectid.ObjectId(uid), 'Status': 'Scheduled', 'SchedulerID': None},
+            {'$set': {'SchedulerID': data.schedulerID, 'LeaseExpiresAt': now+timedelta(seconds=data.leaseSec)}},
+            projection={'_id': 1}
+        )
+        return rec is not None
+    rec = await adb.WorkflowExecutions.find_one_and_update(
+        {'_id': bson.objectid.ObjectId(uid), 'Status': 'Pending'},
+        {'$set': {
+            'Status': 'Scheduled',
+            'ScheduledDate': datetime.now().isoformat(),
+            'StartDate': None,
+            'EndDate': None,
+            'ExecutionLog': None,
+            'SchedulerID': data.schedulerID,
+            'LeaseExpiresAt': now+timedelta(seconds=data.leaseSec),
+        }},
+        projection={'_id': 1}
+    )
+    return rec is not None
+
+
+class M_HeartbeatExecutions(BaseModel):
+    schedulerID: str
+    ids: List[str]
+    leaseSec: float = 120.
+
+@api_router.patch("/executions/heartbeat", tags=["Executions"])
+async def heartbeat_executions(data: M_HeartbeatExecutions, current_user: User_Model = Depends(get_current_authenticated_user)) -> List[str]:
+    'Extend leases of executions owned by *schedulerID*; return IDs of those which are still owned (others were reclaimed).'
+    perms.TODO()
+    query = {'_id': {'$in': [bson.objectid.ObjectId(i) for i in data.ids]}, 'SchedulerID': data.schedulerID, 'Status': {'$in': ['Scheduled', 'Running']}}
+    await adb.WorkflowExecutions.update_many(query, {'$set': {'LeaseExpiresAt': datetime.now(timezone.utc)+timedelta(seconds=data.leaseSec)}})
+    return [str(r['_id']) async for r in adb.WorkflowExecutions.find(query, {'_id': 1})]
+
+
+@api_router.patch("/executions/reclaim_expired", tags=["Executions"])
+def reclaim_expired_executions(current_user: User_Model = Depends(get_current_authenticated_user)) -> dict[str, int]:
+    """
+    Reclaim executions of schedulers which stopped sending heartbeats: Scheduled executions (not started yet) go back to Pending;
+    Running executions are set as Failed, since they might have partially run already and must not be run again.
+    """
+    perms.TODO()
+    now = datetime.now(timezone.utc)
+    pending = db.WorkflowExecutions.update_many(
+        {'Status': 'Scheduled', 'LeaseExpiresAt': {'$lt': now}},
+        {'$set': {'Status': 'Pending', 'ScheduledDate': None, 'SchedulerID': None, 'LeaseExpiresAt': None}}
+    ).modified_count
+    failed = db.WorkflowExecutions.update_many(
+        {'Status': 'Running', 'LeaseExpiresAt': {'$lt': now}},
+        {'$set': {'Status': 'Failed', 'EndDate': datetime.now().isoformat(), 'LeaseExpiresAt': None}}
+    ).modified_count
+    if pending or failed: log.warning(f'Reclaimed executions with expired scheduler lease: {pending} back to Pending, {failed} Failed.')
+    return {'pending': pending, 'failed': failed}
 
 
 # --------------------------------------------------
@@ -1857,15 +2618,24 @@ async def get_temp_dir():
 
 
 @api_router.get("/file/{uid}", tags=["Files"])
-def get_file(uid: str, tdir=Depends(get_temp_dir), current_user: User_Model = Depends(get_current_authenticated_user)):
-    fs = gridfs.GridFS(db)
-    foundfile = fs.get(bson.objectid.ObjectId(uid))
-    if not foundfile: raise NotFoundError('Database reports no file with {uid=}.')
+async def get_file(uid: str, current_user: User_Model = Depends(get_current_authenticated_user)):
     # open the corresponding record in fs.files to check perms
-    perms.ensure(models.GridFSFile_Model.model_validate(db.get_collection('fs.files').find_one({'_id': bson.objectid.ObjectId(uid)})))
-    wfile = io.BytesIO(foundfile.read())
-    fn = foundfile.filename
-    return StreamingResponse(wfile, headers={"Content-Disposition": "attachment; filename=" + fn})
+    rec = await adb.get_collection('fs.files').find_one({'_id': bson.objectid.ObjectId(uid)})
+    if rec is None: raise NotFoundError(f'Database reports no file with {uid=}.')
+    perms.ensure(models.GridFSFile_Model.model_validate(rec))
+    return await _gridfs_download(adb, uid)
+
+
+async def _gridfs_download(adatabase, uid: str) -> StreamingResponse:
+    'Stream GridFS file *uid* chunk by chunk, without reading it into memory first.'
+    foundfile = await AsyncGridFSBucket(adatabase).open_download_stream(bson.objectid.ObjectId(uid))
+    async def chunks():
+        try:
+            while (chunk := await foundfile.readchunk()):
+                API_GRIDFS_BYTES.labels(adatabase.name).inc(len(chunk))
+                yield chunk
+        finally: await foundfile.close()
+    return StreamingResponse(chunks(), media_type='application/octet-stream', headers={"Content-Disposition": "attachment; filename=" + (foundfile.filename or uid), "Content-Length": str(foundfile.length)})
 
 # TODO: needs parent as parameter, so that perms can be checked
 @api_router.post("/file", tags=["Files"])
@@ -1920,6 +2690,8 @@ def get_field_as_vtu(fid: str, tdir=Depends(get_temp_dir), current_user: User_Mo
 @api_router.post("/logs", tags=["Logs"])
 def insert_log(data: dict, request: Request, current_user: User_Model = Depends(get_current_authenticated_user)):
     # perms.notRemote(request,'inserting logging data')
+    # for the TTL index
+    data['createdAt'] = datetime.now(timezone.utc)
     res = db.Logs.insert_one(data)
     return str(res.inserted_id)
 
@@ -1928,6 +2700,39 @@ def insert_log(data: dict, request: Request, current_user: User_Model = Depends(
 # Stats
 # --------------------------------------------------
 
+@api_router.get("/index_stats", tags=["Stats"])
+def get_index_stats(scans_limit: int = 50, current_user: User_Model = Depends(get_current_authenticated_user)):
+    '''
+    Usage of indexes ($indexStats, counted since server start or index creation) in collections with managed indexes
+    (INDEXES), managed indexes which are missing, and the number of collection scans since server start. Recent queries
+    which scanned a whole collection are listed when profiling is enabled on the database (e.g. ``db.setProfilingLevel(1)``,
+    which records slow operations only).
+    '''
+    import bson.json_util
+    if not current_user.rights_admin:
+        raise ForbiddenError("Only admin users can access index statistics.")
+    collections = {}
+    for name in sorted({spec.collection for spec in INDEXES}):
+        stats = list(db[name].aggregate([{'$indexStats': {}}]))
+        keys = [list(st['key'].items()) for st in stats]
+        collections[name] = {
+            'indexes': [{'name': st['name'], 'key': dict(st['key']), 'ops': st['accesses']['ops'], 'since': st['accesses']['since']} for st in stats],
+            'missing': [dict(spec.keys) for spec in INDEXES if spec.collection == name and spec.keys not in keys],
+        }
+    scans = db.command('serverStatus').get('metrics', {}).get('queryExecutor', {}).get('collectionScans', {})
+    profiling = db.command('profile', -1)
+    recentScans = []
+    if profiling.get('was', 0) > 0:
+        recentScans = list(db['system.profile'].find({'planSummary': 'COLLSCAN', 'ns': {'$ne': f'{db.name}.system.profile'}},
+            {'_id': 0, 'ns': 1, 'op': 1, 'command': 1, 'docsExamined': 1, 'millis': 1, 'ts': 1}).sort('ts', DESCENDING).limit(scans_limit))
+    return json.loads(bson.json_util.dumps({
+        'collections': collections,
+        'collectionScans': scans,
+        'profilingLevel': profiling.get('was', 0),
+        'recentCollectionScans': recentScans,
+    }, json_options=bson.json_util.RELAXED_JSON_OPTIONS))
+
+
 @api_router.get("/status", tags=["Stats"])
 def get_status(current_user: User_Model = Depends(get_current_authenticated_user)):
     mupifDBStatus = 'OK'
@@ -1972,6 +2777,7 @@ def get_execution_statistics(current_user: User_Model = Depends(get_current_auth
         finishedExecutions = vals.get('Finished', 0),
         failedExecutions = vals.get('Failed', 0),
         createdExecutions = vals.get('Created', 0),
+        blockedExecutions = vals.get('Blocked', 0),
         pendingExecutions = vals.get('Pending', 0),
         scheduledExecutions = vals.get('Scheduled', 0),
         runningExecutions = vals.get('Running', 0),
@@ -2010,6 +2816,7 @@ def db_init(current_user: User_Model = Depends(get_current_authenticated_user)):
                 log.exception(f'Error populating initial collection {coll} with {rec}.')
         except Exception as e:
             log.exception(f'Error creating initial collection {coll}.')
+    apply_indexes(db)
     try:
         from mupifDB import restApiControl
         restApiControl.postWorkflowFiles('Demo', os.path.dirname(os.path.abspath(__file__))+'/demo/workflowdemo01.py', [])
@@ -2052,6 +2859,23 @@ def set_scheduler_statistics(data: M_ModifyStatistics, request: Request, current
     return False
 
 
+class M_UpdateStatistics(BaseModel):
+    set: dict[str, int] = {}
+    inc: dict[str, int] = {}
+
+SCHEDULER_STAT_KEYS = ("runningTasks", "scheduledTasks", "load", "processedTasks")
+
+@api_router.patch("/scheduler_statistics/update", tags=["Stats"])
+def update_scheduler_statistics(data: M_UpdateStatistics, current_user: User_Model = Depends(get_current_authenticated_user)) -> bool:
+    'Set and increment several scheduler counters in one atomic update.'
+    if not set(data.set) | set(data.inc) <= set(SCHEDULER_STAT_KEYS): return False
+    update = {}
+    if data.set: update['$set'] = {f'scheduler.{k}': int(v) for k, v in data.set.items()}
+    if data.inc: update['$inc'] = {f'scheduler.{k}': int(v) for k, v in data.inc.items()}
+    if update: db.Stat.update_one({}, update)
+    return True
+
+
 @api_router.get("/status2", tags=["Stats"])
 @api_router.get("/status2/", tags=["Stats"], include_in_schema=False)
 def get_status2(current_user: User_Model = Depends(get_current_authenticated_user)):
@@ -2876,18 +3700,9 @@ def dms_api_blob_upload(db: str, blob: fastapi.UploadFile, current_user: User_Mo
 
 
 @api_router.get('/EDM/{db}/blob/{uid}', tags=["EDM"])
-def dms_api_blob_get(db: str, uid: str, tdir=Depends(get_temp_dir), current_user: User_Model = Depends(get_current_authenticated_user)):
-    fs = gridfs.GridFS(GG.db_get(db))
-    foundfile = fs.get(bson.objectid.ObjectId(uid))
-    wfile = io.BytesIO(foundfile.read())
-    fn = foundfile.filename
-    return fastapi.responses.StreamingResponse(wfile, headers={"Content-Disposition": "attachment; filename=" + fn})
-
-    # 'Streaming blob download'
-    # fs=gridfs.GridFS(GG.db_get(db))
-    # def iterfile():
-    #     yield from fs.get(bson.objectid.ObjectId(id))
-    # return fastapi.responses.StreamingResponse(iterfile(),media_type="application/octet-stream")
+async def dms_api_blob_get(db: str, uid: str, current_user: User_Model = Depends(get_current_authenticated_user)):
+    'Streaming blob download'
+    return await _gridfs_download(aclient[db], uid)
 
 
 #
@@ -2985,10 +3800,28 @@ def dms_api_object_list(db: str, type: str, current_user: User_Model = Depends(g
 
 
 class GG(object):
-    '''Global (static) objects for the server, used throughout. Populated at startup here below'''
+    '''
+    Global (static) objects for the server, used throughout. Populated at startup here below.
+
+    The schema cache is per-process; with several server workers, invalidation is propagated through the version number
+    in the CacheInvalidation collection, which each worker compares with its own at most every SCHEMA_CHECK_SEC.
+    '''
     _DB={}
     _SCH={}
     _cli=client  # None
+    SCHEMA_CHECK_SEC=1.
+    _schVersion=None
+    _schChecked=0.
+
+    @staticmethod
+    def _schema_cache_check():
+        if time.monotonic()-GG._schChecked < GG.SCHEMA_CHECK_SEC: return
+        rec=db.CacheInvalidation.find_one({'_id':'schema'})
+        ver=(rec['version'] if rec else 0)
+        if ver!=GG._schVersion:
+            GG._SCH={}
+            GG._schVersion=ver
+        GG._schChecked=time.monotonic()
 
     @staticmethod
     def client_set(cli: pymongo.MongoClient):
@@ -3015,6 +3848,7 @@ class GG(object):
 
     @staticmethod
     def schema_get(db:str,include_id:bool=False):
+        if API_WORKERS>1: GG._schema_cache_check()
         if db not in GG._SCH:
             rawSchema=GG.db_get(db)['schema'].find_one()
             if rawSchema is not None:
@@ -3031,6 +3865,8 @@ class GG(object):
     @staticmethod
     def schema_invalidate_cache():
         GG._SCH={}
+        # other workers
+        if API_WORKERS>1: db.CacheInvalidation.update_one({'_id':'schema'},{'$inc':{'version':1}},upsert=True)
 
     #@pydantic.validate_arguments
     @staticmethod
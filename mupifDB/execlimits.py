@@ -0,0 +1,123 @@
+'''
+CPU sets and resource limits of workflow executions.
+
+Each execution gets a :class:`Allocation` (from :func:`allocate`) according to the ``Limits`` of its workflow, with
+scheduler-wide defaults for unset values (MUPIFDB_EXECUTION_CPUS, MUPIFDB_EXECUTION_CPU_QUOTA,
+MUPIFDB_EXECUTION_MEMORY_MB; 0 means no limit). The allocation is applied to the execution process by
+:func:`apply` (or started through :func:`command`) and returned by :func:`release` once the execution has finished.
+
+CPUs are assigned from those the scheduler may run on, least used first; when all are taken, they are shared
+(executions are never held back because of pinning, that is the job of the pool size).
+
+If MUPIFDB_EXECUTION_CGROUP names a cgroup v2 directory delegated to the scheduler user (e.g. a systemd unit with
+``Delegate=yes``), each execution runs in its own child cgroup with ``cpuset.cpus``, ``cpu.max`` and ``memory.max``
+set, which covers all processes the execution starts; the cgroup is killed and removed on release. Otherwise, CPU
+affinity is set with ``sched_setaffinity`` and memory is limited with ``prlimit`` (``RLIMIT_AS``, i.e. virtual
+memory of each process); CPU quota is not available in that case.
+'''
+import os
+import sys
+import threading
+import time
+import logging
+from typing import List, Optional
+
+import pydantic
+
+from mupifDB import models, execwrap
+
+log = logging.getLogger('execlimits')
+
+DEFAULT_CPUS = int(os.environ.get('MUPIFDB_EXECUTION_CPUS', '0'))
+DEFAULT_CPU_QUOTA = float(os.environ.get('MUPIFDB_EXECUTION_CPU_QUOTA', '0'))
+DEFAULT_MEMORY_MB = int(os.environ.get('MUPIFDB_EXECUTION_MEMORY_MB', '0'))
+CGROUP_ROOT = os.environ.get('MUPIFDB_EXECUTION_CGROUP', '')
+
+CPU_MAX_PERIOD = 100000 # cgroup cpu.max period [us]
+
+
+class Allocation(pydantic.BaseModel):
+    'Resources of one execution; serializable, so that it can be passed to the zygote.'
+    cpus: List[int]=[]
+    cpuQuota: float=0.
+    memoryBytes: int=0
+    cgroup: Optional[str]=None
+
+
+_lock = threading.Lock()
+_cpuUse: dict[int,int] = {} # CPU -> number of executions pinned to it
+
+
+def _available() -> List[int]:
+    return sorted(os.sched_getaffinity(0))
+
+
+def _cgroupUsable() -> bool:
+    return bool(CGROUP_ROOT) and os.access(CGROUP_ROOT+'/cgroup.procs', os.W_OK)
+
+
+def allocate(we_id: str, limits: models.Workflow_Model.Limits_Model) -> Allocation:
+    '''Choose CPUs and limits for execution *we_id*; create its cgroup, if cgroups are used.'''
+    nCpus = (limits.CPUs if limits.CPUs is not None else DEFAULT_CPUS)
+    quota = (limits.CPUQuota if limits.CPUQuota is not None else DEFAULT_CPU_QUOTA)
+    memMB = (limits.MemoryMB if limits.MemoryMB is not None else DEFAULT_MEMORY_MB)
+    ret = Allocation(cpuQuota=quota, memoryBytes=memMB*2**20)
+    if nCpus > 0:
+        with _lock:
+            avail = _available()
+            ret.cpus = sorted(sorted(avail, key=lambda c: (_cpuUse.get(c, 0), c))[:nCpus])
+            for c in ret.cpus: _cpuUse[c] = _cpuUse.get(c, 0)+1
+    if _cgroupUsable() and (ret.cpus or ret.cpuQuota > 0 or ret.memoryBytes > 0):
+        cg = f'{CGROUP_ROOT}/exec-{we_id}'
+        try:
+            os.makedirs(cg, exist_ok=True)
+            if ret.cpus: _write(cg+'/cpuset.cpus', ','.join(str(c) for c in ret.cpus))
+            if ret.cpuQuota > 0: _write(cg+'/cpu.max', f'{int(ret.cpuQuota*CPU_MAX_PERIOD)} {CPU_MAX_PERIOD}')
+            if ret.memoryBytes > 0: _write(cg+'/memory.max', str(ret.memoryBytes))
+            ret.cgroup = cg
+        except OSError as e:
+            log.error(f'Could not set up cgroup {cg}, using affinity and rlimit instead: {repr(e)}')
+            _removeCgroup(cg)
+    elif ret.cpuQuota > 0:
+        log.warning(f'CPU quota of execution {we_id} ignored (cgroup v2 not configured).')
+    return ret
+
+
+def apply(pid: int, alloc: Allocation) -> None:
+    '''Put process *pid* (0 for the calling process) under *alloc*; call before it starts any children.'''
+    execwrap.apply(pid, alloc.model_dump())
+
+
+def command(cmd: List[str], alloc: Allocation) -> List[str]:
+    '''Command running *cmd* under *alloc*, applied (by :mod:`mupifDB.execwrap`) before *cmd* is executed.'''
+    if alloc.cgroup is None and not alloc.cpus and alloc.memoryBytes <= 0: return cmd
+    return [sys.executable, '-I', execwrap.__file__, alloc.model_dump_json()]+cmd
+
+
+def release(alloc: Allocation) -> None:
+    '''Return CPUs of *alloc*; kill what is left in its cgroup and remove it.'''
+    with _lock:
+        for c in alloc.cpus:
+            if (n := _cpuUse.get(c, 0)-1) > 0: _cpuUse[c] = n
+            else: _cpuUse.pop(c, None)
+    if alloc.cgroup is not None: _removeCgroup(alloc.cgroup)
+
+
+def _write(path: str, value: str) -> None:
+    with open(path, 'w') as f: f.write(value)
+
+
+def _removeCgroup(cg: str) -> None:
+    if not os.path.isdir(cg): return
+    try:
+        if os.path.exists(cg+'/cgroup.kill'): _write(cg+'/cgroup.kill', '1')
+        # killed processes take a moment to leave the cgroup
+        for i in range(20):
+            try:
+                os.rmdir(cg)
+                return
+            except OSError:
+                if i == 19: raise
+                time.sleep(.05)
+    except OSError as e:
+        log.warning(f'Could not remove cgroup {cg}: {repr(e)}')
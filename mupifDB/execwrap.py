@@ -0,0 +1,27 @@
+'''
+Apply resource limits of a workflow execution to this process, then replace it by the execution command.
+
+Execution scripts started as new interpreters are run through this wrapper, so that limits are in place before the
+script starts any children, without running Python code between fork and exec of the (multi-threaded) scheduler.
+It only uses the standard library and is run as a script, so that it starts fast; see :func:`mupifDB.execlimits.command`.
+
+Usage: ``python -I execwrap.py ALLOCATION_JSON CMD [ARG ...]``
+'''
+import os
+import sys
+import json
+import resource
+
+
+def apply(pid: int, alloc: dict) -> None:
+    '''Put process *pid* (0 for the calling process) under *alloc* (:obj:`mupifDB.execlimits.Allocation` as dict).'''
+    if alloc.get('cgroup') is not None:
+        with open(alloc['cgroup']+'/cgroup.procs', 'w') as f: f.write(str(pid or os.getpid()))
+        return
+    if alloc.get('cpus'): os.sched_setaffinity(pid, alloc['cpus'])
+    if (mem := alloc.get('memoryBytes', 0)) > 0: resource.prlimit(pid or os.getpid(), resource.RLIMIT_AS, (mem, mem))
+
+
+if __name__ == '__main__':
+    apply(0, json.loads(sys.argv[1]))
+    os.execv(sys.argv[2], sys.argv[2:])
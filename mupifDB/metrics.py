@@ -0,0 +1,42 @@
+'''
+Prometheus metrics of the scheduler and of REST API calls made by clients (scheduler, web interface, execution scripts).
+
+Metrics of the REST API server itself are defined in mupifDB/api/main.py and exposed at its /metrics endpoint; the
+scheduler exposes those below over HTTP at MUPIFDB_SCHEDULER_METRICS_PORT (see :func:`serve`).
+'''
+import re
+import urllib.parse
+import logging
+
+import prometheus_client
+
+log = logging.getLogger('metrics')
+
+QUEUE_DEPTH = prometheus_client.Gauge('mupifdb_scheduler_queue_depth', 'Pending executions seen in the last dispatch round')
+RUNNING = prometheus_client.Gauge('mupifdb_scheduler_running', 'Executions running (or being prepared) under the scheduler')
+POOLSIZE = prometheus_client.Gauge('mupifdb_scheduler_poolsize', 'Limit of concurrently running executions')
+DISPATCH_LATENCY = prometheus_client.Histogram('mupifdb_scheduler_dispatch_latency_seconds', 'Time from submission (Pending) to start of the execution',
+    buckets=(.1, .5, 1, 2, 5, 10, 30, 60, 300, 900, 3600, 4*3600, 86400))
+JOB_DURATION = prometheus_client.Histogram('mupifdb_scheduler_job_duration_seconds', 'Run time of executions', ['workflow', 'status'],
+    buckets=(1, 5, 10, 30, 60, 300, 900, 3600, 4*3600, 12*3600, 86400))
+RESOURCE_CHECK = prometheus_client.Histogram('mupifdb_scheduler_resource_check_seconds', 'Latency of probing availability of models of one workflow',
+    buckets=(.01, .05, .1, .25, .5, 1, 2, 5, 10, 30))
+REST_CALL = prometheus_client.Histogram('mupifdb_rest_client_seconds', 'Latency of REST API calls (until response headers)', ['method', 'endpoint'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+
+_idRe = re.compile(r'/(?:[0-9a-f]{24}|[0-9]+)(?=/|$)')
+
+
+def endpoint(url: str) -> str:
+    'Path of *url* with object IDs and numbers replaced by placeholders, so that the number of label values stays bounded.'
+    return _idRe.sub('/{id}', urllib.parse.urlsplit(url).path)
+
+
+def serve(port: int) -> None:
+    'Serve metrics of this process over HTTP at *port* (in a background thread); 0 does nothing.'
+    if port == 0: return
+    try:
+        prometheus_client.start_http_server(port)
+        log.info(f'Metrics served at port {port}.')
+    except OSError as e:
+        log.error(f'Could not serve metrics at port {port}: {repr(e)}')
@@ -17,7 +17,7 @@ None_FromEmptyStr=Annotated[None, BeforeValidator(lambda x: None if x == '' else
 Bool_FalseFromNone=Annotated[bool, BeforeValidator(lambda x: False if x is None else x)]
 
 
-ExecutionStatus_Literal=Literal['Created','Pending','Scheduled','Running','Finished','Failed']
+ExecutionStatus_Literal=Literal['Created','Blocked','Pending','Scheduled','Running','Finished','Failed']
 
 class StrictBase(pydantic.BaseModel):
     model_config=pydantic.ConfigDict(extra='forbid')
@@ -162,6 +162,7 @@ class WorkflowExecutionCreate_Model(StrictBase):
     version: int
     ip: Optional[str]=''
     no_edm: bool=False
+    priority: int=0
 
 
 class Workflow_Model(MongoObj_Model):
@@ -177,6 +178,11 @@ class Workflow_Model(MongoObj_Model):
             EDMList: Bool_FalseFromNone=False # XXX: document
         Inputs: List[Input_Model]
         Outputs: List[Output_Model]
+    class Limits_Model(StrictBase):
+        'Resources of one execution; None (unset) means the scheduler default (see mupifDB.execlimits).'
+        CPUs: Optional[int]=None        # number of CPUs the execution is pinned to (0: not pinned)
+        CPUQuota: Optional[float]=None  # CPU time, in cores (cgroup v2 only)
+        MemoryMB: Optional[int]=None    # memory limit (0: unlimited)
     wid: str
     Description: str
     GridFSID: Optional[str] = None
@@ -187,6 +193,9 @@ class Workflow_Model(MongoObj_Model):
     Models: List[Model_Model]=[] # XXX: test needs unset
     EDMMapping: List[EDMMapping_Model]=[]
     Version: int=1
+    Limits: Limits_Model=Limits_Model()
+    # reuse outputs of a Finished execution with identical inputs instead of running again (for deterministic workflows)
+    CacheResults: bool=False
 
     def TEMP_getLookupChildren(self) -> List[TEMP_DbLookup_Model]: return [TEMP_DbLookup_Model(where='WorkflowExecutions',attrs=['WorkflowID','WorkflowVersion'],values=[self.wid,self.Version])]
 
@@ -206,10 +215,23 @@ class WorkflowExecution_Model(MongoObj_Model):
     Task_ID: Optional[str]=None
     label: str=''
     Attempts: int=0
+    # upstream executions (whose outputs are linked from inputs) which must be Finished before this one is Pending
+    DependsOn: List[str]=[]
+    # fingerprint of inputs (workflows with CacheResults); execution whose outputs were reused
+    InputsHash: Optional[str]=None
+    CachedFrom: Optional[str]=None
+    # Pending execution is not dispatched before this time (retry backoff)
+    NextAttemptAt: Optional[datetime.datetime]=None
+    # dispatch order of pending executions (higher first), weighed against fair-share usage of RequestedBy and UseCase
+    Priority: int=0
+    UseCase: Optional[str]=None
     EDMMapping: List[EDMMapping_Model]=[]
     # these are only relevant while the execution being processed
     workflowURI: str|None=None
     loggerURI: str|None=None
+    # scheduler instance which claimed the execution, and until when the claim is valid (extended by heartbeats)
+    SchedulerID: Optional[str]=None
+    LeaseExpiresAt: Optional[datetime.datetime]=None
     Inputs: str
     Outputs: str
     InputsData: Optional[List[IODataRecordItem_Model] | None]=None
@@ -244,6 +266,7 @@ class MupifDBStatus_Model(StrictBase):
         finishedExecutions: int=0
         failedExecutions:   int=0
         createdExecutions:  int=0
+        blockedExecutions:  int=0
         pendingExecutions:  int=0
         scheduledExecutions:int=0
         runningExecutions:  int=0
@@ -315,7 +338,11 @@ class Settings_Model(MongoObj_Model):
 class Pagination_Model(StrictBase):
     page: int
     pageSize: int
-    totalCount: int
+    # None if not counted; may be a lower bound (see totalCountExact)
+    totalCount: Optional[int]
+    totalCountExact: bool=True
+    # opaque token to get the following page (keyset pagination), if supported by the endpoint and there may be more items
+    next: Optional[str]=None
 
 # Usecases
 
@@ -9,34 +9,41 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 import json
+import time
+import threading
+import logging
+
+log = logging.getLogger('my_email')
+
+SMTP_CREDENTIALS_FILE = "/var/lib/mupif/persistent/mupif-smtp-credentials.json"
+
+
+def _readCredentials() -> dict:
+    with open(SMTP_CREDENTIALS_FILE) as json_data_file:
+        return json.load(json_data_file)
+
+
+def _message(sender_address, receiver_address, subject, message) -> str:
+    # Setup the MIME
+    msg = MIMEMultipart()
+    msg['From'] = sender_address
+    msg['To'] = receiver_address
+    msg['Subject'] = subject
+    # The body and the attachments for the mail
+    msg.attach(MIMEText(message, 'plain'))
+    return msg.as_string()
 
 
 def sendEmail(receiver_address, subject, message):
     try:
-        username = ''
-        password = ''
-        server = ''
-        with open("/var/lib/mupif/persistent/mupif-smtp-credentials.json") as json_data_file:
-            credentials = json.load(json_data_file)
-            username = credentials['username']
-            password = credentials['password']
-            server = credentials['server']
-
-        sender_address = username
-        sender_pass = password
-        # Setup the MIME
-        msg = MIMEMultipart()
-        msg['From'] = sender_address
-        msg['To'] = receiver_address
-        msg['Subject'] = subject
-        # The body and the attachments for the mail
-        msg.attach(MIMEText(message, 'plain'))
+        credentials = _readCredentials()
+        sender_address = credentials['username']
+        sender_pass = credentials['password']
         # Create SMTP session for sending the mail
-        session = smtplib.SMTP(server)
+        session = smtplib.SMTP(credentials['server'])
         session.starttls()  # enable security
         session.login(sender_address, sender_pass)  # login with mail_id and password
-        text = msg.as_string()
-        session.sendmail(sender_address, receiver_address, text)
+        session.sendmail(sender_address, receiver_address, _message(sender_address, receiver_address, subject, message))
         session.quit()
         return True
     except:
@@ -44,12 +51,84 @@ def sendEmail(receiver_address, subject, message):
 
 
 def sendEmailAboutExecutionStatus(eid):
-    settings = restApiControl.getSettings()
-    web_server = settings.webUrl
-    execution = restApiControl.getExecutionRecord(eid)
-    if execution.RequestedBy != '' and web_server != '':
-        text = f'Your execution of workflow "{execution.WorkflowID}" (v{execution.WorkflowVersion}) is now in Status "{execution.Status}". You can view its detail here: {web_server}/executions/{eid}'
-        if execution.Status == 'Created':
-            text += ' It has probably reached the limit of attempts for execution while some resources were not available.'
-        return sendEmail(execution.RequestedBy, 'MuPIF DB execution info', text)
-    return False
+    '''Queue notification of the user who requested execution *eid* about its current status (sent by NotificationWorker).'''
+    return restApiControl.notifyExecution(eid)
+
+
+class NotificationWorker(threading.Thread):
+    '''
+    Send queued notifications (see the notifications endpoints of the REST API): claim due ones every POLL_SEC, send them
+    over one SMTP connection (credentials are read when it is opened), which is kept open while in use and closed after
+    IDLE_SEC of inactivity or an SMTP error, and report which were sent and which failed (to be retried by the API).
+    Notifications to the same recipient claimed together (digest) are sent as one message.
+    '''
+    POLL_SEC = 10
+    IDLE_SEC = 60
+    LEASE_SEC = 300
+
+    def __init__(self, workerID: str):
+        super().__init__(name='notifications', daemon=True)
+        self.workerID = workerID
+        self.stopped = threading.Event()
+        self.session: smtplib.SMTP|None = None
+        self.sender = '' # login of the open session
+        self.lastUse = 0.
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def _connect(self) -> smtplib.SMTP:
+        '''Open the SMTP connection (reading credentials), unless already open.'''
+        if self.session is not None: return self.session
+        credentials = _readCredentials()
+        session = smtplib.SMTP(credentials['server'], timeout=60)
+        session.starttls()
+        session.login(credentials['username'], credentials['password'])
+        self.session, self.sender = session, credentials['username']
+        return session
+
+    def _send(self, to: str, subject: str, text: str) -> None:
+        self._connect().sendmail(self.sender, to, _message(self.sender, to, subject, text))
+
+    def _close(self) -> None:
+        if self.session is None: return
+        try: self.session.quit()
+        except Exception: pass
+        self.session = None
+
+    def sendBatch(self, items: list[dict]) -> tuple[list[str], list[str]]:
+        'Send claimed notifications; return IDs of sent and failed ones.'
+        byRecipient: dict[str, list[dict]] = {}
+        for it in items: byRecipient.setdefault(it['to'], []).append(it)
+        sent, failed = [], []
+        for to, its in byRecipient.items():
+            ids = [it['id'] for it in its]
+            if len(its) == 1: subject, text = its[0]['subject'], its[0]['text']
+            else: subject, text = f'{its[0]["subject"]} ({len(its)} notifications)', '\n\n'.join(it['text'] for it in its)
+            try:
+                try: self._send(to, subject, text)
+                except smtplib.SMTPServerDisconnected:
+                    # the kept connection was closed by the server meanwhile
+                    self._close()
+                    self._send(to, subject, text)
+                sent += ids
+            except (OSError, smtplib.SMTPException, KeyError, ValueError) as e:
+                log.warning(f'Sending notification to {to} failed: {repr(e)}')
+                self._close()
+                failed += ids
+        self.lastUse = time.time()
+        return sent, failed
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                items = restApiControl.claimNotifications(self.workerID, lease_sec=self.LEASE_SEC)
+                if items:
+                    sent, failed = self.sendBatch(items)
+                    restApiControl.notificationsDone(sent, failed)
+                    continue
+            except Exception as e:
+                log.error(f'Error processing notifications: {repr(e)}')
+            if self.session is not None and time.time()-self.lastUse > self.IDLE_SEC: self._close()
+            self.stopped.wait(self.POLL_SEC)
+        self._close()
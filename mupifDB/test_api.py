@@ -0,0 +1,95 @@
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+
+# importing does not connect to the database (MongoClient connects lazily, indexes are applied at app startup)
+from .api import main
+from .models import User_Model
+from bson.objectid import ObjectId
+
+
+def _session(tok,uid='u1',expires=timedelta(hours=1)):
+    return main.Session_Model(session_token=tok,user_id=uid,expires_at=datetime.now(timezone.utc)+expires)
+
+def _user(mail='a@b.c'):
+    return User_Model(mail=mail,name='A',surname='B',password='x')
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    # invalidations are then not propagated through the database
+    monkeypatch.setattr(main,'API_WORKERS',1)
+
+class TestAuthCache:
+    def test_01_get_put(self,single_worker):
+        c=main.AuthCache(ttl=30,size=10)
+        assert c.get('t1') is None
+        c.put(_session('t1'),_user())
+        s,u=c.get('t1')
+        assert s.session_token=='t1' and u.mail=='a@b.c'
+    def test_02_ttl(self,single_worker):
+        c=main.AuthCache(ttl=0.05,size=10)
+        c.put(_session('t1'),_user())
+        assert c.get('t1') is not None
+        time.sleep(0.1)
+        assert c.get('t1') is None
+        assert 't1' not in c.entries
+    def test_03_session_expiry(self,single_worker):
+        # not kept beyond the session expiry, even if TTL is longer
+        c=main.AuthCache(ttl=30,size=10)
+        c.put(_session('t1',expires=timedelta(seconds=-1)),_user())
+        assert c.get('t1') is None
+    def test_04_lru(self,single_worker):
+        c=main.AuthCache(ttl=30,size=2)
+        c.put(_session('t1'),_user())
+        c.put(_session('t2'),_user())
+        # t1 becomes the most recently used, so t2 is evicted by t3
+        assert c.get('t1') is not None
+        c.put(_session('t3'),_user())
+        assert c.get('t2') is None
+        assert c.get('t1') is not None and c.get('t3') is not None
+        assert len(c.entries)==2
+    def test_05_disabled(self,single_worker):
+        c=main.AuthCache(ttl=30,size=0)
+        c.put(_session('t1'),_user())
+        assert c.get('t1') is None
+    def test_06_invalidate(self,single_worker):
+        c=main.AuthCache(ttl=30,size=10)
+        c.put(_session('t1',uid='u1'),_user())
+        c.put(_session('t2',uid='u1'),_user())
+        c.put(_session('t3',uid='u2'),_user())
+        c.invalidate(session_token='t3')
+        assert c.get('t3') is None and c.get('t1') is not None
+        c.invalidate(user_id='u1')
+        assert c.get('t1') is None and c.get('t2') is None
+    def test_07_version(self,single_worker):
+        # invalidation by another worker (version change) drops all entries
+        c=main.AuthCache(ttl=30,size=10)
+        c.set_version(1)
+        c.put(_session('t1'),_user())
+        c.set_version(1)
+        assert c.get('t1') is not None
+        c.set_version(2)
+        assert c.get('t1') is None
+
+class TestExecutionsCursor:
+    def test_01_roundtrip(self):
+        rec={'_id':ObjectId('6709724d88e11a5a42f7caea'),'CreatedDate':datetime(2024,5,1,12,0,0,123000)}
+        q=main._executions_cursor_query(main._executions_cursor_encode(rec))
+        assert q=={'$or':[{'CreatedDate':{'$lt':rec['CreatedDate']}},{'CreatedDate':rec['CreatedDate'],'_id':{'$lt':rec['_id']}}]}
+    def test_02_ties(self):
+        # executions created at the same time are ordered by _id, so that none is skipped or repeated across pages
+        created=datetime(2024,5,1,12,0,0)
+        recs=[{'_id':ObjectId(f'6709724d88e11a5a42f7cae{i}'),'CreatedDate':created} for i in range(3)]
+        q=main._executions_cursor_query(main._executions_cursor_encode(recs[1]))
+        tie=q['$or'][1]
+        assert tie['CreatedDate']==created
+        assert [r['_id'] for r in recs if r['_id']<tie['_id']['$lt']]==[recs[0]['_id']]
+    def test_03_legacy_date(self):
+        # string CreatedDate of old records
+        rec={'_id':ObjectId('6709724d88e11a5a42f7caea'),'CreatedDate':'2024-05-01 12:00:00'}
+        q=main._executions_cursor_query(main._executions_cursor_encode(rec))
+        assert q['$or'][0]=={'CreatedDate':{'$lt':'2024-05-01 12:00:00'}}
+    def test_04_invalid(self):
+        for cur in ('garbage','',main.base64.urlsafe_b64encode(b'[1,"not-an-oid"]').decode()):
+            with pytest.raises(main.HTTPException) as e: main._executions_cursor_query(cur)
+            assert e.value.status_code==400
@@ -31,6 +31,7 @@ restApiControl.setRESTserver(MUPIFDB_REST_SERVER)
 
 sys.path.append(mupifDB.__path__[0]+'/..')
 import workflows.mini01 as wfmini01
+import workflows.mini02 as wfmini02
 
 @pytest.fixture
 def nameserver(xprocess):
@@ -198,4 +199,40 @@ class TestFoo:
             assert resp.status_code==200
 
         # time.sleep(10)
+    def test_03_unblock_set_param(self,restApi):
+        # upstream execution reporting Finished through set_param (as the execution script does) promotes the Blocked one
+        wid=wfmini02.MiniWorkflow2().metadata.ID
+        restApiControl.postWorkflowFiles('useCase1',wfmini02.__file__,[])
+        up=restApiControl.createExecution(wid,version=1,ip='localhost')['inserted_id']
+        down=restApiControl.createExecution(wid,version=1,ip='localhost')['inserted_id']
+        restApiControl.setExecutionInputLink(down,'Length','',up,'Length','')
+        restApiControl.scheduleExecution(up)
+        restApiControl.scheduleExecution(down)
+        assert restApiControl.getExecutionRecord(down).Status=='Blocked'
+        restApiControl.setExecutionStatus(up,'Running')
+        restApiControl.setExecutionStatus(up,'Finished')
+        assert restApiControl.getExecutionRecord(up).Status=='Finished'
+        assert restApiControl.getExecutionRecord(down).Status=='Pending'
+    def test_04_result_cache(self,restApi):
+        # second execution with identical inputs, submitted through /schedule, is finished with outputs of the first
+        wid=wfmini02.MiniWorkflow2().metadata.ID
+        from mupifDB.api.client_util import NotFoundResponse
+        try: restApiControl.getWorkflowRecord(wid,-1)
+        except NotFoundResponse: restApiControl.postWorkflowFiles('useCase1',wfmini02.__file__,[])
+        wrec=restApiControl.getWorkflowRecord(wid,-1)
+        wrec.CacheResults=True
+        restApiControl.updateWorkflow(wrec)
+        value={'ClassName':'ConstantProperty','ValueType':'Scalar','DataID':'PID_Length','Unit':'m','Value':1.5,'Time':None}
+        first=restApiControl.createExecution(wid,version=wrec.Version,ip='localhost')['inserted_id']
+        restApiControl.setExecutionInputObject(first,'Length','',value)
+        restApiControl.scheduleExecution(first)
+        assert restApiControl.getExecutionRecord(first).Status=='Pending'
+        restApiControl.setExecutionStatus(first,'Running')
+        restApiControl.setExecutionStatus(first,'Finished')
+        second=restApiControl.createExecution(wid,version=wrec.Version,ip='localhost')['inserted_id']
+        restApiControl.setExecutionInputObject(second,'Length','',value)
+        restApiControl.scheduleExecution(second)
+        exe=restApiControl.getExecutionRecord(second)
+        assert exe.Status=='Finished'
+        assert exe.CachedFrom==first
     # def test_schedule(self, ex2server):
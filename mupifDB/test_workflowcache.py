@@ -0,0 +1,50 @@
+import io
+import os
+import zipfile
+import pytest
+
+from . import workflowcache
+
+
+def _zip(files):
+    buf=io.BytesIO()
+    with zipfile.ZipFile(buf,mode='w') as zf:
+        for name,data in files.items(): zf.writestr(name,data)
+    return buf.getvalue()
+
+@pytest.fixture
+def cache(tmp_path,monkeypatch):
+    downloads=[]
+    archives={'wf1':(_zip({'wf1.py':'print(1)','data/a.txt':'a'*1000}),'wf1.zip'),'wf2':(b'print(2)','wf2.py')}
+    def getBinaryFileByID(fid):
+        downloads.append(fid)
+        return archives[fid]
+    monkeypatch.setattr(workflowcache.restApiControl,'getBinaryFileByID',getBinaryFileByID)
+    monkeypatch.setattr(workflowcache,'CACHE_DIR',str(tmp_path/'cache'))
+    return downloads
+
+class TestWorkflowCache:
+    def test_01_download_once(self,cache,tmp_path):
+        for i in range(3):
+            dest=tmp_path/f'exec{i}'
+            dest.mkdir()
+            fn,filenames=workflowcache.fillWorkflowFiles('wf1',str(dest))
+            assert fn=='wf1.zip'
+            assert set(filenames)=={'wf1.py','data/a.txt'}
+            assert (dest/'wf1.py').read_text()=='print(1)'
+            assert (dest/'data/a.txt').exists()
+            assert not (dest/'wf1.zip').exists()
+        assert cache==['wf1']
+    def test_02_execution_modifies_files(self,cache,tmp_path):
+        (tmp_path/'e1').mkdir(); (tmp_path/'e2').mkdir()
+        workflowcache.fillWorkflowFiles('wf2',str(tmp_path/'e1'))
+        (tmp_path/'e1'/'wf2.py').write_text('modified')
+        workflowcache.fillWorkflowFiles('wf2',str(tmp_path/'e2'))
+        assert (tmp_path/'e2'/'wf2.py').read_text()=='print(2)'
+    def test_03_evict(self,cache,tmp_path,monkeypatch):
+        monkeypatch.setattr(workflowcache,'CACHE_MAX_MB',1e-6)
+        (tmp_path/'e1').mkdir(); (tmp_path/'e2').mkdir()
+        workflowcache.fillWorkflowFiles('wf1',str(tmp_path/'e1'))
+        workflowcache.fillWorkflowFiles('wf2',str(tmp_path/'e2'))
+        # wf1 evicted as least recently used, the entry just used is kept
+        assert sorted(os.listdir(workflowcache.CACHE_DIR))==['.lock','wf2']
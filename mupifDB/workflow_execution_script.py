@@ -12,7 +12,7 @@ import mupif as mp
 import Pyro5.errors
 
 def downloadWorkflowFiles(eid):
-    import zipfile
+    import mupifDB.workflowcache
     we_rec = mupifDB.restApiControl.getExecutionRecord(eid)
     workflowVersion = int(we_rec.WorkflowVersion)
     wid = we_rec.WorkflowID
@@ -20,11 +20,7 @@ def downloadWorkflowFiles(eid):
 
     python_script_filename = workflow_record.modulename + ".py"
 
-    fc, fn = mupifDB.restApiControl.getBinaryFileByID(workflow_record.GridFSID)
-    file_path = f'./{fn}'
-    with open(file_path, "wb") as f:
-        f.write(fc)
-        f.close()
+    fn, filenames = mupifDB.workflowcache.fillWorkflowFiles(workflow_record.GridFSID, '.')
 
     if fn.split('.')[-1] == 'py':
         log.info("downloaded .py file..")
@@ -34,13 +30,10 @@ def downloadWorkflowFiles(eid):
             log.info("Filename check FAILED")
 
     elif fn.split('.')[-1] == 'zip':
-        log.info("downloaded .zip file, extracting..")
+        log.info("downloaded .zip file, extracted")
         log.info(fn)
-        zf = zipfile.ZipFile(file_path, mode='r')
-        filenames = zipfile.ZipFile.namelist(zf)
         log.info("Zipped files:")
         log.info(filenames)
-        zf.extractall(path='./')
         if python_script_filename in filenames:
             log.info("Filename check OK")
         else:
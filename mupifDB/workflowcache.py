@@ -0,0 +1,137 @@
+'''
+Node-local cache of workflow source files.
+
+The file of a workflow version (single .py module or .zip archive) stored in GridFS never changes, so it is
+downloaded (and extracted) only once per node and kept under MUPIFDB_WORKFLOW_CACHE_DIR; each execution directory
+is then filled from the cached tree. Entries are keyed by GridFS ID, their content sha256 is recorded for
+reference. The least recently used entries are evicted once the cache exceeds MUPIFDB_WORKFLOW_CACHE_MAX_MB
+(0 disables the cache altogether).
+
+Execution directories are filled by copying; with MUPIFDB_WORKFLOW_CACHE_HARDLINK=1, files are hard-linked
+instead, which is faster but lets a workflow modifying its own files in place corrupt the cache.
+
+The cache is shared by several processes (scheduler pool workers, execution scripts): new entries are extracted
+into a temporary directory and renamed atomically; eviction holds an exclusive lock, filling a shared one.
+'''
+import os
+import shutil
+import zipfile
+import tempfile
+import hashlib
+import json
+import time
+import fcntl
+import contextlib
+import logging
+from typing import List, Tuple
+
+from mupifDB import restApiControl
+
+log = logging.getLogger('workflowcache')
+
+CACHE_DIR = os.environ.get('MUPIFDB_WORKFLOW_CACHE_DIR', tempfile.gettempdir()+'/mupifDB-workflow-cache')
+CACHE_MAX_MB = float(os.environ.get('MUPIFDB_WORKFLOW_CACHE_MAX_MB', '2000'))
+CACHE_HARDLINK = (os.environ.get('MUPIFDB_WORKFLOW_CACHE_HARDLINK', '0') == '1')
+
+
+@contextlib.contextmanager
+def _locked(exclusive: bool):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CACHE_DIR+'/.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try: yield
+        finally: fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _unpack(content: bytes, filename: str, destDir: str) -> List[str]:
+    'Write the downloaded file into *destDir* (extracting .zip archives); return names of the files.'
+    if filename.split('.')[-1] == 'zip':
+        zipPath = destDir+'/'+filename
+        with open(zipPath, 'wb') as f: f.write(content)
+        with zipfile.ZipFile(zipPath, mode='r') as zf:
+            filenames = zf.namelist()
+            zf.extractall(path=destDir)
+        os.remove(zipPath)
+        return filenames
+    with open(destDir+'/'+filename, 'wb') as f: f.write(content)
+    return [filename]
+
+
+def _entryDir(gridfsID: str) -> str:
+    return CACHE_DIR+'/'+gridfsID
+
+
+def _readMeta(entry: str) -> dict | None:
+    try:
+        with open(entry+'/meta.json') as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+
+def _addEntry(gridfsID: str) -> dict:
+    'Download the file and store it as a new cache entry; return its metadata.'
+    content, filename = restApiControl.getBinaryFileByID(gridfsID)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.tmp-')
+    try:
+        os.mkdir(tmp+'/tree')
+        filenames = _unpack(content, filename, tmp+'/tree')
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, ff in os.walk(tmp+'/tree') for f in ff)
+        meta = dict(filename=filename, filenames=filenames, sha256=hashlib.sha256(content).hexdigest(), size=size)
+        with open(tmp+'/meta.json', 'w') as f: json.dump(meta, f)
+        entry = _entryDir(gridfsID)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # added by another process meanwhile (fine), or a leftover of interrupted eviction (replace it)
+            if _readMeta(entry) is not None: return meta
+            shutil.rmtree(entry, ignore_errors=True)
+            os.rename(tmp, entry)
+        log.info(f'Workflow file {gridfsID} ({filename}, {size} bytes) added to the cache.')
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return meta
+
+
+def _evict(keep: str) -> None:
+    'Remove least recently used entries (except *keep*) until the cache fits into CACHE_MAX_MB.'
+    entries = []
+    for e in os.scandir(CACHE_DIR):
+        if e.name.startswith('.') or not e.is_dir(): continue
+        meta = _readMeta(e.path)
+        entries.append((e.stat().st_mtime, e.name, meta['size'] if meta else 0))
+    total = sum(size for _, _, size in entries)
+    for mtime, name, size in sorted(entries):
+        if total <= CACHE_MAX_MB*1e6: break
+        if name == keep: continue
+        log.info(f'Evicting workflow file {name} from the cache.')
+        shutil.rmtree(_entryDir(name), ignore_errors=True)
+        total -= size
+
+
+def _link(src: str, dst: str) -> None:
+    try: os.link(src, dst)
+    except OSError: shutil.copy2(src, dst) # e.g. a different filesystem
+
+
+def _fill(src: str, destDir: str) -> None:
+    shutil.copytree(src, destDir, dirs_exist_ok=True, copy_function=(_link if CACHE_HARDLINK else shutil.copy2))
+
+
+def fillWorkflowFiles(gridfsID: str, destDir: str) -> Tuple[str, List[str]]:
+    '''
+    Put files of the workflow stored under *gridfsID* into *destDir*, using the node-local cache.
+    Return the original filename (.py or .zip) and names of the (extracted) files.
+    '''
+    if CACHE_MAX_MB <= 0:
+        content, filename = restApiControl.getBinaryFileByID(gridfsID)
+        return filename, _unpack(content, filename, destDir)
+    entry = _entryDir(gridfsID)
+    with _locked(exclusive=False):
+        meta = _readMeta(entry)
+        if meta is None: meta = _addEntry(gridfsID)
+        else: log.info(f'Workflow file {gridfsID} found in the cache.')
+        _fill(entry+'/tree', destDir)
+        # mark as recently used
+        os.utime(entry, (time.time(), time.time()))
+    with _locked(exclusive=True):
+        _evict(keep=gridfsID)
+    return meta['filename'], meta['filenames']
@@ -73,6 +73,10 @@ def checkInput(eid, name, obj_id, object_type, data_id, linked_output=False, edm
             link_name = inp_record.Link.Name
             link_oid = inp_record.Link.ObjID
             if link_eid != "" and link_name != "":
+                # output of an upstream execution which did not finish yet is set by the time this one runs,
+                # since it is Blocked until then
+                if client.getExecutionRecord(link_eid).Status not in ('Finished', 'Failed'):
+                    return True
                 # check linked value
                 return checkInput(
                     eid=link_eid,
@@ -8,16 +8,19 @@ import atexit
 import tempfile
 import multiprocessing
 import subprocess
-import enum
 import pidfile
-import zipfile
-import ctypes
+import threading
+import concurrent.futures
+import asyncio
 import json
-import jsonpickle
+import codecs
+import socket
+import uuid
+import psutil
 import textwrap
-from typing import Tuple
+from typing import Tuple, Callable, Iterable
 
-from mupifDB import restApiControl, restLogger, my_email
+from mupifDB import restApiControl, restLogger, my_email, workflowcache, zygote, execlimits, metrics, models
 
 from pathlib import Path
 import shutil
@@ -48,6 +51,46 @@ logging.getLogger("urllib3").propagate = False
 
 LOOP_SLEEP_SEC=20
 
+# 'push': a background thread long-polls the REST API for newly Pending executions and wakes up the main loop
+#         right away; the periodic sweep every LOOP_SLEEP_SEC is kept as fallback
+# 'poll': only the periodic sweep
+DISPATCH_MODE=os.environ.get('MUPIFDB_SCHEDULER_DISPATCH','push')
+LONGPOLL_TIMEOUT_SEC=30
+
+# jobmanager availability for a given set of models is re-used for this long
+RESOURCE_CHECK_TTL_SEC=10
+# number of resource probes (and workflow record fetches) running concurrently
+RESOURCE_CHECK_THREADS=8
+
+# changes of scheduler statistics are written to the database at most once per this interval
+STAT_SYNC_SEC=5
+
+# workflow log is streamed to the database every LOG_STREAM_SEC while the execution runs, in chunks of at most LOG_CHUNK_CHARS
+LOG_STREAM_SEC=5
+LOG_CHUNK_CHARS=256*1024
+
+# Prometheus metrics (mupifDB/metrics.py) are served at this port; 0 disables
+METRICS_PORT=int(os.environ.get('MUPIFDB_SCHEDULER_METRICS_PORT','8007'))
+
+# pending executions which cannot run (resources unavailable) are retried with exponential backoff
+# (BACKOFF_BASE_SEC, doubled with each attempt up to BACKOFF_MAX_SEC, i.e. about a day in total); after
+# MAX_ATTEMPTS, they are returned to Created and the user is notified
+BACKOFF_BASE_SEC=30
+BACKOFF_MAX_SEC=3600
+MAX_ATTEMPTS=30
+
+# several schedulers may share one database: each claims Pending executions atomically under its ID, and keeps
+# extending the lease of claimed executions every HEARTBEAT_SEC; executions of a scheduler which did not send
+# heartbeat for LEASE_SEC are reclaimed by other schedulers (Scheduled -> Pending, Running -> Failed)
+SCHEDULER_ID=os.environ.get('MUPIFDB_SCHEDULER_ID',f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}')
+LEASE_SEC=120
+HEARTBEAT_SEC=30
+
+# run execution scripts forked from a warm interpreter with mupif etc. already imported (see mupifDB.zygote),
+# instead of starting a new interpreter for each; falls back to the latter if the zygote is not reachable
+USE_ZYGOTE=(os.environ.get('MUPIFDB_SCHEDULER_ZYGOTE','0')=='1')
+zygoteSocket: str|None=None
+
 # try to import schedulerconfig.py
 authToken = None
 try:
@@ -62,14 +105,28 @@ schedulerStatFile = "/var/lib/mupif/persistent/scheduler-stat.json"
 ns = mp.pyroutil.connectNameserver()
 ns_uri = str(ns._pyroUri)
 
-poolsize = 30
+poolsize = 30 # maximum number of concurrently running executions (current value, if adaptive)
+# adaptive mode: poolsize is adjusted every POOLSIZE_ADAPT_SEC within POOLSIZE_MIN..POOLSIZE_MAX, lowered when the host
+# is overloaded (CPU, memory or load average above the limits below), raised when all slots are busy and the host,
+# judging by resources used by running executions, has room for more
+POOLSIZE_ADAPTIVE=(os.environ.get('MUPIFDB_SCHEDULER_ADAPTIVE','0')=='1')
+POOLSIZE_MIN=int(os.environ.get('MUPIFDB_SCHEDULER_POOLSIZE_MIN','4'))
+POOLSIZE_MAX=int(os.environ.get('MUPIFDB_SCHEDULER_POOLSIZE_MAX','256'))
+POOLSIZE_ADAPT_SEC=10
+HOST_CPU_MAX=90.  # percent
+HOST_MEM_MAX=85.  # percent
+HOST_LOAD_MAX=1.5 # 1-minute load average per CPU
+runningPids: dict[str,int]={} # execution ID -> PID of running execution script
+# threads for blocking operations of executions (REST calls, copying files) in the supervisor
+SUPERVISOR_THREADS=16
 stopFlag = False # set to tru to end main scheduler loop
+wakeup = threading.Event() # set to run the next sweep of pending executions immediately
+ownedExecutions: set[str] = set() # executions claimed by this scheduler, queued or running in the supervisor
+ownedLock = threading.Lock()
 
 
 import pydantic
 from typing import Literal,List,Optional
-import threading
-import multiprocessing
 
 
 class SchedulerStat(mp.BareData):
@@ -81,6 +138,7 @@ class SchedulerStat(mp.BareData):
         failed: int=0
     tasks: Tasks=Tasks()
     load: float=0.
+    poolsize: int=0 # effective limit of concurrent executions
     class JobInfo(mp.BareData):
         we_id: str
         wid: str
@@ -129,11 +187,12 @@ class SchedulerStat(mp.BareData):
         match[0].status=status
 
     def updateLoad(self) -> None:
+        self.poolsize=poolsize
         self.load=int(100*self.tasks.running*1./poolsize)
         self.hist48h.load[-1]=self.load
     def sync(self):
         self.updateLoad()
-        restApiControl.setStatScheduler(
+        restApiControl.updateStatScheduler(
             runningTasks=self.tasks.running,
             scheduledTasks=self.tasks.scheduled,
             processedTasks=self.tasks.processed,
@@ -170,16 +229,20 @@ def pyro_only(no_remote=False):
 @Pyro5.api.expose
 class SchedulerMonitor(object):
     """
-    Communication point about scheduler statistics. No locking necessary, since all access is done through Pyro which serializes the calls.
+    Communication point about scheduler statistics. Updated in-process by the scheduler (under lock), exposed over Pyro for reading.
+    Changes are written to the database at most once per STAT_SYNC_SEC (see :obj:`syncStat`).
     """
 
     # class attribute, holding the URI of the instance once exposed over Pyro
     URI: str|None=None
+    # class attribute, holding the instance used in this process
+    instance: Optional['SchedulerMonitor']=None
 
     def __init__(self, ns): # , schedulerStat,lock):
         self.ns = ns
         self.stat = SchedulerStat()
         self.lock = threading.RLock()
+        self.dirty = False
         global schedulerStatFile
         if (Path(schedulerStatFile).is_file()):
             try:
@@ -198,8 +261,7 @@ class SchedulerMonitor(object):
     def getStatistics(self,raw=False):
         # raw=True makes it suitable for reconstructing the model on the other side
         # the default raw=False will return data translated to the old format
-        self.advanceTime()
-        s=self.stat
+        s=self._statSnapshot()
         if raw: return s.model_dump(mode='json')
         return dict(
             runningTasks     = s.tasks.running,
@@ -230,66 +292,144 @@ class SchedulerMonitor(object):
     def registerPyro(self,*,daemon,ns,uri,appName,exclusiveDaemon): 
         pass
 
-    @pyro_only(no_remote=True)
-    def updateRunning(self,we_id,wid):
-        self.advanceTime()
-        self.stat.tasks.scheduled-=1
-        self.stat.tasks.running+=1
-        self.stat.lastJobNew(SchedulerStat.JobInfo(we_id=we_id,wid=wid,status='Running',started=datetime.datetime.now(),finished=None))
-        self.stat.sync()
-
-    @pyro_only(no_remote=True)
-    def updateScheduled(self,numPending: int):
-        self.advanceTime()
-        self.stat.tasks.scheduled=numPending
-        self.stat.hist48h.pooled[-1]+=numPending
-        self.stat.sync()
-
-    @pyro_only(no_remote=True)
-    def updateFinished(self,retCode,we_id):
-        self.advanceTime()
-        self.stat.tasks.running-=1
-        self.stat.tasks.processed+=1
-        self.stat.hist48h.processed[-1]+=1
-        if retCode==0:
-            self.stat.tasks.finished+=1
-            self.stat.hist48h.finished[-1]+=1
-        else:
-            self.stat.tasks.failed+=1
-            self.stat.hist48h.failed[-1]+=1
-        self.stat.lastJobDone(we_id=we_id,status=('Finished' if retCode==0 else 'Failed'),finished=datetime.datetime.now())
-        self.stat.sync()
+    # the _update* methods are called from within the scheduler process only (not exposed via Pyro)
+    def _updateRunning(self,we_id,wid):
+        with self.lock:
+            self.advanceTime()
+            self.stat.tasks.scheduled-=1
+            self.stat.tasks.running+=1
+            self.stat.lastJobNew(SchedulerStat.JobInfo(we_id=we_id,wid=wid,status='Running',started=datetime.datetime.now(),finished=None))
+            self.dirty=True
+
+    def _updateScheduled(self,numPending: int):
+        with self.lock:
+            self.advanceTime()
+            self.stat.tasks.scheduled=numPending
+            self.stat.hist48h.pooled[-1]+=numPending
+            self.dirty=True
+
+    def _updateFinished(self,retCode,we_id):
+        with self.lock:
+            self.advanceTime()
+            self.stat.tasks.running-=1
+            self.stat.tasks.processed+=1
+            self.stat.hist48h.processed[-1]+=1
+            if retCode==0:
+                self.stat.tasks.finished+=1
+                self.stat.hist48h.finished[-1]+=1
+            else:
+                self.stat.tasks.failed+=1
+                self.stat.hist48h.failed[-1]+=1
+            self.stat.lastJobDone(we_id=we_id,status=('Finished' if retCode==0 else 'Failed'),finished=datetime.datetime.now())
+            self.dirty=True
+
+    def _statSnapshot(self) -> SchedulerStat:
+        with self.lock:
+            self.advanceTime()
+            return self.stat.model_copy(deep=True)
+
+    def _syncStat(self):
+        'Write statistics to the database, if changed since the last call (outside of the lock).'
+        with self.lock:
+            if not self.dirty: return
+            self.dirty=False
+            self.stat.updateLoad()
+            stat=self.stat.model_copy(deep=True)
+        try: stat.sync()
+        except Exception as e:
+            log.error(f'Error writing scheduler statistics: {repr(e)}')
+            with self.lock: self.dirty=True
+
+    def _persistStat(self):
+        self._statSnapshot().save_to_file(schedulerStatFile)
 
-    @pyro_only(no_remote=True)
-    def persistStat(self):
-        self.advanceTime()
-        self.stat.save_to_file(schedulerStatFile)
 
+def statSyncer():
+    'Coalesces statistics changes into at most one database write per STAT_SYNC_SEC; runs in a background thread.'
+    while stopFlag is not True:
+        time.sleep(STAT_SYNC_SEC)
+        if SchedulerMonitor.instance is not None: SchedulerMonitor.instance._syncStat()
 
 
 
-def copyLogToDB (we_id, workflowLogName):
+
+class LogStreamer(object):
+    '''
+    Sends new content of the workflow log file to the execution log (in chunks) each time :obj:`flush` is called.
+    Content which could not be sent (REST API unavailable) is kept and sent with the next flush.
+    '''
+    def __init__(self, we_id: str, path: str):
+        self.we_id, self.path = we_id, path
+        self.pos, self.seq, self.pending = 0, 0, ''
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.lock = threading.Lock()
+
+    def flush(self, final=False) -> None:
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(self.pos)
+                    b = f.read()
+                self.pos += len(b)
+                self.pending += self.decoder.decode(b, final=final)
+                while self.pending:
+                    chunk = self.pending[:LOG_CHUNK_CHARS]
+                    restApiControl.appendExecutionLogChunk(self.we_id, self.seq, chunk)
+                    self.seq += 1
+                    self.pending = self.pending[len(chunk):]
+            except Exception as e:
+                log.error(f'Error streaming log of {self.we_id}: {repr(e)}')
+
+    async def follow(self) -> None:
+        '''Flush every LOG_STREAM_SEC, until cancelled.'''
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(LOG_STREAM_SEC)
+            await loop.run_in_executor(None, self.flush)
+
+
+def copyLogToDB (we_id, workflowLogName) -> Optional[str]:
+    '''Upload the log file; return its ID, to be set as ExecutionLog of the execution.'''
     try:
-        with open(workflowLogName,'r') as f:
-            for l in f: log.info('WORKFLOW LOG: '+l[:-1])
         log.info("Copying log files to database")
         with open(workflowLogName, 'rb') as f:
             logID = restApiControl.uploadBinaryFile(f)
-            if logID is not None:
-                restApiControl.setExecutionParameter(we_id, 'ExecutionLog', logID)
             log.info("Copying log files done")
+            return logID
     except Exception as e:
         log.error(repr(e))
+    return None
 
 
-def executeWorkflow(we_id: str) -> None:
+async def executeWorkflow(we_id: str) -> None:
+    '''
+    Run the execution, in the supervisor event loop. Blocking parts (REST calls, file operations) run in the loop's
+    thread pool executor, the workflow subprocess is awaited in the loop itself.
+    '''
+    loop = asyncio.get_running_loop()
     try:
         log.info("executeWorkflow invoked")
-        return executeWorkflow_inner1(we_id)
+        job = await loop.run_in_executor(None, executeWorkflow_inner1, we_id)
+        if job is None: return
+        try:
+            streamer = LogStreamer(we_id, job.workflowLogName)
+            follower = asyncio.create_task(streamer.follow())
+        except BaseException:
+            # otherwise released by executeWorkflow_finish
+            execlimits.release(job.limits)
+            raise
+        try:
+            completed = await executeWorkflow_run(job)
+        except Exception:
+            log.exception(f'Error running workflow execution {we_id}')
+            completed = 1
+        finally:
+            follower.cancel()
+        await loop.run_in_executor(None, executeWorkflow_finish, job, completed, streamer)
     except Exception as e:
         log.exception("Execution of workflow %s failed." % we_id)
 
-def executeWorkflow_inner1(we_id: str) -> None:
+def executeWorkflow_inner1(we_id: str) -> Optional['ExecutionJob']:
     we_rec = restApiControl.getExecutionRecord(we_id)
     if we_rec is None:
         log.error("Workflow Execution record %s not found" % we_id)
@@ -313,106 +453,200 @@ def executeWorkflow_inner1(we_id: str) -> None:
         log.error("WEID %s not scheduled for execution" % we_id)
         raise KeyError("WEID %s not scheduled for execution" % we_id)
 
-def executeWorkflow_inner2(we_id: str, we_rec, workflow_record) -> None:
-    '''Process workflow which is already scheduled'''
-    _mon=Pyro5.api.Proxy(SchedulerMonitor.URI)
+
+class ExecutionJob(pydantic.BaseModel):
+    'Execution prepared to run: temporary directory with inputs, command and its environment.'
+    we_id: str
+    execution: models.WorkflowExecution_Model
+    tempDir: str
+    workflowLogName: str
+    cmd: List[str]
+    env: dict[str,str]
+    started: datetime.datetime
+    limits: execlimits.Allocation
+
+
+def executeWorkflow_inner2(we_id: str, we_rec, workflow_record) -> Optional[ExecutionJob]:
+    '''Prepare workflow which is already scheduled; return None if it could not be prepared (and was set as Failed).'''
+    _mon=SchedulerMonitor.instance
+    assert _mon is not None
     wid = we_rec.WorkflowID
-    completed = 1  # todo check
     log.info("we_rec status is Scheduled, processing")
     # execute the selected workflow
     # take workflow source and run python interpreter on it in a temporary directory
     tempRoot = '/tmp'
     log.info("Creating temp dir")
-    with tempfile.TemporaryDirectory(dir=tempRoot, prefix='mupifDB') as tempDir:
-        # if (1):  # uncomment this to keep temdDir
-        #     tempDir = tempfile.mkdtemp(dir=tempRoot, prefix='mupifDB_')
-        log.info("temp dir %s created" % (tempDir,))
-        workflowLogName = tempDir+'/workflow.log'
-        execScript = Path(tempDir+'/workflow_execution_script.py')
-        # copy workflow source to tempDir
-        try:
-            executeWorkflow_copyInputs(we_id,workflow_record,tempDir,execScript)
-        except Exception as e:
-            log.exception('Error in executeWorkflow_inner2')
-            # set execution code to failed ...yes or no?
-            restApiControl.setExecutionStatus(we_id,'Failed')
-            my_email.sendEmailAboutExecutionStatus(we_id)
-            return None
-        # execute
-        log.info("Executing we_id %s, tempdir %s" % (we_id, tempDir))
-        # update status
-        _mon.updateRunning(we_id,wid)
-        # updateStatRunning(lock, schedulerStat, we_id, wid)
-        #runningJobs[we_id]=wid # for runtime monitoring
-        restApiControl.setExecutionStatus(we_id,'Running')
-        restApiControl.setExecutionAttemptsCount(we_id, we_rec.Attempts+1)
-        # uses the same python interpreter as the current process
-        cmd = [sys.executable, execScript, '-eid', str(we_id)]
-        # log.info(cmd)
+    tempDir = tempfile.mkdtemp(dir=tempRoot, prefix='mupifDB')
+    log.info("temp dir %s created" % (tempDir,))
+    workflowLogName = tempDir+'/workflow.log'
+    execScript = Path(tempDir+'/workflow_execution_script.py')
+    # copy workflow source to tempDir
+    try:
+        executeWorkflow_copyInputs(we_id,workflow_record,tempDir,execScript)
+    except Exception as e:
+        log.exception('Error in executeWorkflow_inner2')
+        shutil.rmtree(tempDir, ignore_errors=True)
+        # set execution code to failed ...yes or no?
+        restApiControl.transitionExecution(we_id,'Failed', notify=True, expect={'Status': 'Scheduled', 'SchedulerID': SCHEDULER_ID})
+        return None
+    # update status; only if still owned, as the lease may have expired (and the execution was reclaimed) while queued
+    if not restApiControl.transitionExecution(we_id, 'Running', inc={'Attempts': 1}, expect={'Status': 'Scheduled', 'SchedulerID': SCHEDULER_ID}):
+        log.warning(f'Execution {we_id} is not Scheduled by this scheduler anymore, not running it.')
+        shutil.rmtree(tempDir, ignore_errors=True)
+        return None
+    log.info("Executing we_id %s, tempdir %s" % (we_id, tempDir))
+    _mon._updateRunning(we_id,wid)
+    if we_rec.SubmittedDate: metrics.DISPATCH_LATENCY.observe((datetime.datetime.now()-we_rec.SubmittedDate).total_seconds())
+    # uses the same python interpreter as the current process
+    cmd = [sys.executable, str(execScript), '-eid', str(we_id)]
+    env = os.environ.copy()
+    if 'PYTHONPATH' in env:
+        env['PYTHONPATH'] += f'{os.pathsep}{mupifDBSrcDir}'
+    else:
+        env['PYTHONPATH'] = mupifDBSrcDir
+    env['MUPIF_NS'] = ns_uri
+    env['API_CREDENTIALS_FILE'] = os.environ.get('API_CREDENTIALS_FILE', "None")
+    limits = execlimits.allocate(we_id, workflow_record.Limits)
+    try:
+        job = ExecutionJob(we_id=we_id, execution=we_rec, tempDir=tempDir, workflowLogName=workflowLogName, cmd=cmd, env=env, started=datetime.datetime.now(), limits=limits)
         with open(workflowLogName, 'w') as workflowLog:
             ll = 10*'='
             workflowLog.write(textwrap.dedent(f'''
-                {ll} WORKFLOW STARTING at {(t0:=datetime.datetime.now()).isoformat(timespec='seconds')} {ll}
-                {ll} command is {cmd} {ll}'''))
-            env = os.environ.copy()
-            if 'PYTHONPATH' in env:
-                env['PYTHONPATH'] += f'{os.pathsep}{mupifDBSrcDir}'
-            else:
-                env['PYTHONPATH'] = mupifDBSrcDir
-            env['MUPIF_NS'] = ns_uri
-            env['API_CREDENTIALS_FILE'] = os.environ.get('API_CREDENTIALS_FILE', "None")
-
-            completed = subprocess.call(cmd, cwd=tempDir, stderr=subprocess.STDOUT, stdout=workflowLog, env=env)
+                {ll} WORKFLOW STARTING at {job.started.isoformat(timespec='seconds')} {ll}
+                {ll} command is {cmd} {ll}
+                {ll} limits: CPUs {limits.cpus or 'any'}, CPU quota {limits.cpuQuota or 'none'}, memory {limits.memoryBytes//2**20 or 'unlimited'} MB{' (cgroup)' if limits.cgroup else ''} {ll}'''))
+    except BaseException:
+        execlimits.release(limits)
+        raise
+    return job
+
+
+async def executeWorkflow_run(job: ExecutionJob) -> int:
+    '''Run the execution script (from the zygote, if running, otherwise as new interpreter); return its exit code.'''
+    if zygoteSocket is not None:
+        try: return await zygote.runAsync(zygoteSocket, job.cmd[1], job.cmd[2:], cwd=job.tempDir, env=job.env, logPath=job.workflowLogName, limits=job.limits,
+            onStart=lambda pid: runningPids.__setitem__(job.we_id, pid))
+        # only if nothing was started; a connection lost later is a failed execution (raised)
+        except zygote.Unavailable as e: log.error(f'Zygote not available, starting new interpreter: {repr(e)}')
+        finally: runningPids.pop(job.we_id, None)
+    with open(job.workflowLogName, 'a') as workflowLog:
+        # limits are applied by a wrapper before the script is executed, so that they cover everything it starts (as in the zygote)
+        proc = await asyncio.create_subprocess_exec(*execlimits.command(job.cmd, job.limits), cwd=job.tempDir, stdin=subprocess.DEVNULL, stdout=workflowLog, stderr=subprocess.STDOUT, env=job.env)
+    runningPids[job.we_id] = proc.pid
+    try: return await proc.wait()
+    finally: runningPids.pop(job.we_id, None)
+
+
+def executeWorkflow_finish(job: ExecutionJob, completed: int, streamer: LogStreamer) -> None:
+    '''Store the log, update statistics and execution status; remove the temporary directory.'''
+    _mon=SchedulerMonitor.instance
+    assert _mon is not None
+    we_id = job.we_id
+    try:
+        with open(job.workflowLogName, 'a') as workflowLog:
+            ll = 10*'='
             workflowLog.write(textwrap.dedent(f'''
                 {ll} WORKFLOW FINISHED at {(t1:=datetime.datetime.now()).isoformat(timespec='seconds')} {ll}
-                {ll} duration: {str((dt:=(t1-t0))-datetime.timedelta(microseconds=dt.microseconds))} {ll}
-                {ll} exit status of {cmd}: {completed} ({'ERROR' if completed!=0 else 'SUCCESS'}) {ll}'''))
-
-        # log.info(tempDir)
-        log.info('command:' + str(cmd) + ' Return Code:'+str(completed))
+                {ll} duration: {str((dt:=(t1-job.started))-datetime.timedelta(microseconds=dt.microseconds))} {ll}
+                {ll} exit status of {job.cmd}: {completed} ({'ERROR' if completed!=0 else 'SUCCESS'}) {ll}'''))
 
-        # store execution log
-        logID = None
+        log.info('command:' + str(job.cmd) + ' Return Code:'+str(completed))
 
-        p = Path(tempDir)
+        p = Path(job.tempDir)
         for it in p.iterdir():
             log.info(it)
 
-        try:
-            copyLogToDB(we_id, workflowLogName)
-        except:
-            log.info("Copying log files was not successful")
+        streamer.flush(final=True)
+        logID = copyLogToDB(we_id, job.workflowLogName)
 
         # update status
-        _mon.updateFinished(completed,we_id)
-        # updateStatFinished(lock, schedulerStat, completed, we_id)
-        # del runningJobs[we_id] # remove we_id from running jobs; for monitoring
+        _mon._updateFinished(completed,we_id)
+    finally:
+        execlimits.release(job.limits)
+        shutil.rmtree(job.tempDir, ignore_errors=True)
     log.info("Updating we_id %s status to %s" % (we_id, completed))
-    # set execution code to completed
-    if completed == 0:
-        log.warning("Workflow execution %s Finished" % we_id)
-        restApiControl.setExecutionStatus(we_id,'Finished')
-        my_email.sendEmailAboutExecutionStatus(we_id)
-        # return we_id, ExecutionResult.Finished # XXX ??
-    elif completed == 1:
-        log.warning("Workflow execution %s Failed" % we_id)
-        restApiControl.setExecutionStatus(we_id,'Failed')
-        my_email.sendEmailAboutExecutionStatus(we_id)
-        # return we_id, ExecutionResult.Failed # XXX ??
+    # set execution code to completed, together with the log
+    logSet = ({'ExecutionLog': logID} if logID is not None else {})
+    metrics.JOB_DURATION.labels(job.execution.WorkflowID, {0: 'Finished', 1: 'Failed', 2: 'Deferred'}.get(completed, 'Error')).observe((datetime.datetime.now()-job.started).total_seconds())
+    if completed in (0, 1):
+        status: Literal['Finished','Failed'] = ('Finished' if completed == 0 else 'Failed')
+        log.warning(f"Workflow execution {we_id} {status}")
+        # the execution script has usually set the status already (through set_param, without notification)
+        restApiControl.transitionExecution(we_id, status, set=logSet, notify='always')
     elif completed == 2:
         log.warning("Workflow execution %s could not be initialized due to lack of resources" % we_id)
-        restApiControl.setExecutionStatus(we_id, 'Pending', revertPending=True)
-    else:
-        pass
+        restApiControl.transitionExecution(we_id, 'Pending', set=logSet)
+        restApiControl.deferExecution(we_id, BACKOFF_BASE_SEC, BACKOFF_MAX_SEC)
+    elif logSet:
+        restApiControl.transitionExecution(we_id, set=logSet)
+
+
+class ExecutionSupervisor(object):
+    '''
+    Runs workflow executions as subprocesses tracked by a single asyncio event loop (in a background thread), at
+    most *limit* at a time; further submitted executions wait for a free slot.
+    '''
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.cond = asyncio.Condition()
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=SUPERVISOR_THREADS, thread_name_prefix='supervisor'))
+        self.tasks: set[concurrent.futures.Future] = set()
+        self.waiting: dict[str, asyncio.Task] = {} # executions waiting for a free slot (only accessed from the loop)
+        self.thread = threading.Thread(target=self.loop.run_forever, name='supervisor', daemon=True)
+        self.thread.start()
+
+    async def _execute(self, weid: str) -> None:
+        self.waiting[weid] = asyncio.current_task()
+        try:
+            async with self.cond:
+                await self.cond.wait_for(lambda: self.running < self.limit)
+                self.running += 1
+        finally: self.waiting.pop(weid, None)
+        try:
+            await executeWorkflow(weid)
+        finally:
+            async with self.cond:
+                self.running -= 1
+                self.cond.notify_all()
+
+    def setLimit(self, limit: int) -> None:
+        '''Change the maximum number of concurrent executions (thread-safe); running executions are not affected when lowered.'''
+        async def _set():
+            async with self.cond:
+                self.limit = limit
+                self.cond.notify_all()
+        asyncio.run_coroutine_threadsafe(_set(), self.loop).result()
+
+    def submit(self, weid: str, done: Callable[[], None]) -> concurrent.futures.Future:
+        '''Schedule execution of *weid* (thread-safe); *done* is called when it finishes.'''
+        fut = asyncio.run_coroutine_threadsafe(self._execute(weid), self.loop)
+        self.tasks.add(fut)
+        def _done(f):
+            self.tasks.discard(f)
+            done()
+        fut.add_done_callback(_done)
+        return fut
+
+    def drop(self, weids: Iterable[str]) -> None:
+        '''Cancel those of *weids* which are still waiting for a free slot (thread-safe); started ones are not affected.'''
+        def _drop():
+            for weid in weids:
+                if (task := self.waiting.pop(weid, None)) is not None: task.cancel()
+        self.loop.call_soon_threadsafe(_drop)
+
+    def stop(self) -> None:
+        '''Wait for all executions to finish, then stop the event loop.'''
+        concurrent.futures.wait(list(self.tasks))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
 
 
 def executeWorkflow_copyInputs(we_id,workflow_record,tempDir,execScript) -> None:
     python_script_filename = workflow_record.modulename + ".py"
 
-    fc, fn = restApiControl.getBinaryFileByID(workflow_record.GridFSID)
-    with open(tempDir + '/' + fn, "wb") as f:
-        f.write(fc)
-        f.close()
+    fn, filenames = workflowcache.fillWorkflowFiles(workflow_record.GridFSID, tempDir)
 
     if fn.split('.')[-1] == 'py':
         log.info("downloaded .py file..")
@@ -422,13 +656,10 @@ def executeWorkflow_copyInputs(we_id,workflow_record,tempDir,execScript) -> None
             log.info("Filename check FAILED")
 
     elif fn.split('.')[-1] == 'zip':
-        log.info("downloaded .zip file, extracting..")
+        log.info("downloaded .zip file, extracted")
         log.info(fn)
-        zf = zipfile.ZipFile(tempDir + '/' + fn, mode='r')
-        filenames = zipfile.ZipFile.namelist(zf)
         log.info("Zipped files:")
         log.info(filenames)
-        zf.extractall(path=tempDir)
         if python_script_filename in filenames:
             log.info("Filename check OK")
         else:
@@ -442,27 +673,74 @@ def executeWorkflow_copyInputs(we_id,workflow_record,tempDir,execScript) -> None
     shutil.copy(mupifDBModDir+'/workflow_execution_script.py', execScript)
 
 
-def stopPool(var_pool):
+def executionsUsage() -> Tuple[float,float]:
+    '''Average CPU (percent of one core, since the last call) and memory (RSS, bytes) used by running executions (including their children).'''
+    cpu, mem, n = 0., 0., 0
+    for pid in list(runningPids.values()):
+        try:
+            procs = [proc := _usageProcs.setdefault(pid, psutil.Process(pid))] + proc.children(recursive=True)
+            cpu += sum(p.cpu_percent(None) for p in procs)
+            mem += sum(p.memory_info().rss for p in procs)
+            n += 1
+        except psutil.Error: pass
+    for pid in set(_usageProcs)-set(runningPids.values()): del _usageProcs[pid]
+    return (cpu/n, mem/n) if n else (0., 0.)
+_usageProcs: dict[int,'psutil.Process']={} # keep Process objects, so that cpu_percent measures since the last call
+
+
+def adaptPoolsize(supervisor) -> None:
+    '''Adjust poolsize to the host load (see POOLSIZE_ADAPTIVE); runs in a background thread.'''
+    global poolsize
+    ncpu = psutil.cpu_count() or 1
+    psutil.cpu_percent(None)
+    while stopFlag is not True:
+        time.sleep(POOLSIZE_ADAPT_SEC)
+        try:
+            cpu, vm, load = psutil.cpu_percent(None), psutil.virtual_memory(), os.getloadavg()[0]/ncpu
+            jobCpu, jobMem = executionsUsage()
+            new = poolsize
+            if cpu > HOST_CPU_MAX or vm.percent > HOST_MEM_MAX or load > HOST_LOAD_MAX:
+                new = int(.8*poolsize)
+            # no usage sample of running executions (yet): do not grow blindly
+            elif supervisor.running >= poolsize and (jobCpu > 0 or jobMem > 0):
+                # how many more executions like those running would fit; at most double at once
+                room = 2*poolsize
+                if jobCpu > 0: room = min(room, supervisor.running+int((HOST_CPU_MAX-cpu)*ncpu/jobCpu))
+                if jobMem > 0: room = min(room, supervisor.running+int((vm.available-(100-HOST_MEM_MAX)/100*vm.total)/jobMem))
+                new = max(poolsize, room)
+            new = max(POOLSIZE_MIN, min(POOLSIZE_MAX, new))
+            if new != poolsize:
+                log.info(f'Pool size {poolsize} -> {new} (host CPU {cpu:.0f}%, memory {vm.percent:.0f}%, load {load:.2f}/CPU; execution average CPU {jobCpu:.0f}%, memory {jobMem/2**20:.0f} MB)')
+                poolsize = new
+                supervisor.setLimit(new)
+        except Exception as e:
+            log.error(f'Error adapting pool size: {repr(e)}')
+
+
+def stopSupervisor(supervisor):
     try:
-        log.info("Stopping the scheduler, waiting for workers to terminate")
+        log.info("Stopping the scheduler, waiting for executions to terminate")
         # @TODO: do not reset processedTasks, continue counting
         restApiControl.setStatScheduler(runningTasks=0, scheduledTasks=0, load=0, processedTasks=0)
-        var_pool.close()  # close pool
-        var_pool.join()  # wait for completion
+        supervisor.stop()
         log.info("All tasks finished, exiting")
     except Exception as e:
         log.error(repr(e))
 
 
+def probeModelsResources(models_md) -> bool:
+    'Ask the nameserver/jobmanagers whether resources for all *models_md* (Workflow.Models metadata) are available.'
+    try:
+        with metrics.RESOURCE_CHECK.time():
+            return mp.Workflow.checkModelRemoteResourcesByMetadata(models_md=models_md)
+    except:
+        return False
+
+
 def checkWorkflowResources(wid, version):
     try:
         workflow = restApiControl.getWorkflowRecord(wid, int(version))
-        models_md = workflow.Models
-        try:
-            res = mp.Workflow.checkModelRemoteResourcesByMetadata(models_md=models_md)
-            return res
-        except:
-            return False
+        return probeModelsResources(workflow.Models)
     except Exception as e:
         log.error(repr(e))
         return False
@@ -472,14 +750,49 @@ def checkExecutionResources(eid):
     try:
         log.info("Checking execution resources")
         execution = restApiControl.getExecutionRecord(eid)
-        return checkWorkflowResources(execution.WorkflowID, execution.WorkflowVersion)
+        return checkExecutionsResources([execution])[eid]
     except Exception as e:
         log.exception('Error in checkExecutionResources')
         return False
 
 
+# cache of jobmanager availability, keyed by serialized Models metadata of the workflow; values are (time.monotonic() of the probe, result)
+_resourceProbeCache: dict[str,Tuple[float,bool]] = {}
+
+def checkExecutionsResources(executions) -> dict[str,bool]:
+    """
+    Check resources for many executions at once, returning dict {execution id: resources available}.
 
-def scheduler_startup_execute_scheduled(pool):
+    Workflow records are fetched only once for every (wid, version) and jobmanagers are probed only once for every
+    distinct Models metadata; probes run concurrently (RESOURCE_CHECK_THREADS) and their results are cached for
+    RESOURCE_CHECK_TTL_SEC, so that executions of the same workflow share one probe per sweep.
+    """
+    if not executions: return {}
+    wvs = set([(wed.WorkflowID, int(wed.WorkflowVersion)) for wed in executions])
+    with concurrent.futures.ThreadPoolExecutor(max_workers=RESOURCE_CHECK_THREADS, thread_name_prefix='resource-check') as pool:
+        def _workflowModels(wv):
+            try:
+                return restApiControl.getWorkflowRecord(*wv).Models
+            except Exception as e:
+                log.error(f'Error getting workflow record {wv}: {repr(e)}')
+                return None
+        # (wid,version) -> Models metadata (None if the workflow could not be retrieved)
+        wvModels = dict(zip(wvs, pool.map(_workflowModels, wvs)))
+        # Models key -> Models metadata
+        keyModels = dict([(json.dumps([m.model_dump() for m in md], sort_keys=True), md) for md in wvModels.values() if md is not None])
+        now = time.monotonic()
+        stale = [key for key in keyModels if (key not in _resourceProbeCache or now-_resourceProbeCache[key][0] > RESOURCE_CHECK_TTL_SEC)]
+        log.info(f'Checking resources for {len(executions)} executions: {len(wvs)} workflows, {len(keyModels)} distinct model sets, {len(stale)} to be probed.')
+        for key, res in zip(stale, pool.map(lambda key: probeModelsResources(keyModels[key]), stale)):
+            _resourceProbeCache[key] = (now, res)
+    ret = {}
+    for wed in executions:
+        md = wvModels[(wed.WorkflowID, int(wed.WorkflowVersion))]
+        ret[wed.dbID] = (md is not None) and _resourceProbeCache[json.dumps([m.model_dump() for m in md], sort_keys=True)][1]
+    return ret
+
+
+def scheduler_startup_execute_scheduled(supervisor):
     # import first already scheduled executions
     try:
         scheduled_executions = restApiControl.getScheduledExecutions()
@@ -487,6 +800,9 @@ def scheduler_startup_execute_scheduled(pool):
         log.exception('Error getting scheduled execution:')
         scheduled_executions = []
 
+    # executions claimed by other (live) schedulers are theirs; those of dead schedulers are reclaimed once their lease expires
+    scheduled_executions = [wed for wed in scheduled_executions if wed.SchedulerID is None]
+    available = checkExecutionsResources(scheduled_executions)
     for wed in scheduled_executions:
         log.info(f'{wed.dbID} found as Scheduled')
         # add the correspoding weid to the pool, change status to scheduled
@@ -494,81 +810,153 @@ def scheduler_startup_execute_scheduled(pool):
         assert weid is not None # make pyright happy
         # result1 = pool.apply_async(test)
         # log.info(result1.get())
-        if checkExecutionResources(weid):
-            result = pool.apply_async(executeWorkflow, args=(weid,), callback=procFinish, error_callback=procError)
+        if available[weid]:
+            # another scheduler starting at the same time may see it as well
+            try:
+                if not restApiControl.claimExecution(weid, SCHEDULER_ID, LEASE_SEC, unowned=True):
+                    log.info(f'WEID {weid} claimed by another scheduler')
+                    continue
+            except Exception as e:
+                log.exception(f'Error claiming scheduled execution {weid=}:')
+                continue
+            result = submitExecution(supervisor, weid)
             log.info(result)
             log.info(f"WEID {weid} added to the execution pool")
         else:
             log.info(f"WEID {weid} cannot be scheduled due to unavailable resources")
             try:
-                we_rec = restApiControl.getExecutionRecord(weid)
-                restApiControl.setExecutionAttemptsCount(weid, we_rec.Attempts + 1)
+                restApiControl.transitionExecution(weid, inc={'Attempts': 1})
             except Exception as e:
                 log.exception('Error running scheduled execution {weid=}:')
 
 
-def scheduler_schedule_pending(pool):
+def scheduler_schedule_pending(supervisor):
+    # return executions of schedulers which died back to the queue
+    try:
+        restApiControl.reclaimExpiredExecutions()
+    except Exception as e:
+        log.exception('Error reclaiming executions with expired lease')
     # retrieve weids with status "Scheduled" from DB
     try:
-        pending_executions = restApiControl.getPendingExecutions(num_limit=poolsize*10)
+        # in dispatch order (priority, age, fair-share)
+        pending_executions = restApiControl.getPendingExecutionsQueue(limit=poolsize*10)
     except Exception as e:
         log.exception('Error checking pending executions')
         pending_executions = []
 
-    monitor=Pyro5.api.Proxy(SchedulerMonitor.URI)
-    monitor.updateScheduled(len(pending_executions))
+    monitor=SchedulerMonitor.instance
+    assert monitor is not None
+    monitor._updateScheduled(len(pending_executions))
+    metrics.QUEUE_DEPTH.set(len(pending_executions))
 
+    # probe resources for all executions at once (concurrently, sharing probes between executions of the same workflow)
+    available = checkExecutionsResources([wed for wed in pending_executions if int(wed.Attempts) <= MAX_ATTEMPTS])
     for wed in pending_executions:
         weid = wed.dbID
         assert weid is not None # make pyright happy
         log.info(f'{weid} found as pending ({wed.Attempts=})')
         # check number of attempts for execution
-        if int(wed.Attempts) > 12:
+        if int(wed.Attempts) > MAX_ATTEMPTS:
             try:
-                restApiControl.setExecutionStatus(weid,'Created')
-                my_email.sendEmailAboutExecutionStatus(weid)
+                restApiControl.transitionExecution(weid,'Created', notify=True)
             except Exception as e:
                 log.exception('')
         else:
-            time.sleep(2)
-            if checkExecutionResources(weid):
-                # add the correspoding weid to the pool, change status to scheduled
+            if available[weid]:
+                # claim the execution (change status to scheduled), add the correspoding weid to the pool
                 res = False
                 try:
-                    res = restApiControl.setExecutionStatus(weid,'Scheduled')
+                    res = restApiControl.claimExecution(weid, SCHEDULER_ID, LEASE_SEC)
                 except Exception as e:
                     log.exception('')
 
                 if not res:
-                    log.info("Could not update execution status")
-                else:
-                    log.info("Updated status of execution")
+                    log.info(f"WEID {weid} could not be claimed (taken by another scheduler?)")
+                    continue
+                log.info("Updated status of execution")
 
-                result = pool.apply_async(executeWorkflow, args=(weid,), callback=procFinish, error_callback=procError)
+                result = submitExecution(supervisor, weid)
                 # log.info(result.get())
                 log.info(f"WEID {weid} added to the execution pool")
             else:
-                log.info(f"WEID {weid} cannot be scheduled due to unavailable resources")
+                log.info(f"WEID {weid} cannot be scheduled due to unavailable resources, deferring")
                 try:
-                    we_rec = restApiControl.getExecutionRecord(weid)
-                    restApiControl.setExecutionAttemptsCount(weid, we_rec.Attempts + 1)
+                    restApiControl.deferExecution(weid, BACKOFF_BASE_SEC, BACKOFF_MAX_SEC)
                 except Exception as e:
-                    log.exception('Failure getting execution record (for execution with resources unavailable)')
+                    log.exception('Failure deferring execution (with resources unavailable)')
 
 
     # display progress (consider use of tqdm)
     lt = time.localtime(time.time())
     try:
-        stat=SchedulerStat.model_validate(monitor.getStatistics(raw=True))
+        stat=monitor._statSnapshot()
         log.info(f'Scheduled/Running/Load: {stat.tasks.scheduled}/{stat.tasks.running}/{stat.load}')
     except Exception as e:
         log.exception('')
 
 
-# callbacks for the task pool
-def procInit():     pass
-def procFinish(r):  pass
-def procError(e):   log.error('Error running pool task:',exc_info=e)
+def pendingWatcher():
+    '''
+    Long-polls the REST API for executions becoming Pending and wakes up the main loop; runs in a background thread.
+    Returns (ending the push mode, with periodic sweep only) if the server does not support long-polling.
+    '''
+    log.info('Watching for pending executions')
+    while stopFlag is not True:
+        try:
+            if restApiControl.waitForPendingExecutions(timeout=LONGPOLL_TIMEOUT_SEC): wakeup.set()
+        except restApiControl.NotFoundResponse:
+            log.warning('REST API does not support waiting for pending executions, using periodic polling only.')
+            return
+        except Exception as e:
+            log.error(f'Error waiting for pending executions: {repr(e)}')
+            time.sleep(LOOP_SLEEP_SEC)
+
+
+def submitExecution(supervisor, weid):
+    'Pass *weid* to the supervisor; it is kept in ownedExecutions (and its lease extended) until the execution finishes.'
+    with ownedLock: ownedExecutions.add(weid)
+    def release(weid=weid):
+        with ownedLock: ownedExecutions.discard(weid)
+    return supervisor.submit(weid, done=release)
+
+
+def heartbeat(supervisor):
+    '''
+    Extends lease of executions owned by this scheduler every HEARTBEAT_SEC, drops queued executions whose lease was lost;
+    runs in a background thread.
+    '''
+    while stopFlag is not True:
+        time.sleep(HEARTBEAT_SEC)
+        with ownedLock: ids = list(ownedExecutions)
+        if not ids: continue
+        try:
+            alive = set(restApiControl.heartbeatExecutions(SCHEDULER_ID, ids, LEASE_SEC))
+            if lost := set(ids)-alive:
+                log.warning(f'Lease of executions lost (reclaimed or finished meanwhile): {", ".join(sorted(lost))}')
+                # those not started yet may have been claimed by another scheduler already
+                supervisor.drop(lost)
+        except Exception as e:
+            log.error(f'Error sending heartbeat: {repr(e)}')
+
+
+def startZygote():
+    'Start the zygote process (with the same environment as execution scripts) and wait until it accepts jobs.'
+    global zygoteSocket
+    sock = tempfile.mkdtemp(prefix='mupifDB-zygote-')+'/zygote.sock'
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join([p for p in (env.get('PYTHONPATH'), mupifDBSrcDir) if p])
+    env['MUPIF_NS'] = ns_uri
+    env['API_CREDENTIALS_FILE'] = os.environ.get('API_CREDENTIALS_FILE', "None")
+    proc = subprocess.Popen([sys.executable, '-m', 'mupifDB.zygote', sock], env=env)
+    atexit.register(proc.terminate)
+    for i in range(100):
+        if os.path.exists(sock):
+            log.info(f'Zygote running at {sock}')
+            zygoteSocket = sock
+            return
+        if proc.poll() is not None: break
+        time.sleep(.2)
+    log.error('Zygote did not start, execution scripts will run in new interpreters.')
 
 
 def main():
@@ -590,45 +978,55 @@ def main():
     if 1:
         _monitor = SchedulerMonitor(ns)
         SchedulerMonitor.URI=_monitor.runServer()
-        monitor=Pyro5.api.Proxy(SchedulerMonitor.URI)
+        SchedulerMonitor.instance=_monitor
+        threading.Thread(target=statSyncer, name='stat-syncer', daemon=True).start()
 
 
 
-        # https://github.com/mupif/mupifDB/issues/14
-        # explicitly use forking (instead of spawning) so that there are no leftover monitoring processes
-        # if scheduler gets killed externally (such as in the docker by supervisor, which won't reap
-        # orphan processes
-        # even though fork is the default for POSIX, mp.simplejobmanager was setting the (global)
-        # default to spawn, therefore it was used here as well. So better to be explicit (and also
-        # fix the — perhaps unnecessary now? — global setting in simplejobmanager)
-        pool = multiprocessing.get_context('fork').Pool(processes=poolsize, initializer=procInit)
-        atexit.register(stopPool, pool)
+        # executions are subprocesses of this process, tracked by the supervisor event loop; there are no
+        # worker processes which could be left over when the scheduler gets killed externally
+        # (https://github.com/mupif/mupifDB/issues/14)
+        if USE_ZYGOTE: startZygote()
+        supervisor = ExecutionSupervisor(limit=poolsize)
+        if POOLSIZE_ADAPTIVE: threading.Thread(target=adaptPoolsize, args=(supervisor,), name='poolsize', daemon=True).start()
+        metrics.RUNNING.set_function(lambda: supervisor.running)
+        metrics.POOLSIZE.set_function(lambda: poolsize)
+        metrics.serve(METRICS_PORT)
+        atexit.register(stopSupervisor, supervisor)
         try:
             with pidfile.PIDFile(filename='mupifDB_scheduler_pidfile'):
-                log.info("Starting MupifDB Workflow Scheduler")
+                log.info(f"Starting MupifDB Workflow Scheduler {SCHEDULER_ID}")
 
                 sys.excepthook = Pyro5.errors.excepthook
 
                 try:
+                    threading.Thread(target=heartbeat, args=(supervisor,), name='heartbeat', daemon=True).start()
+                    # e-mails queued by status changes (any scheduler instance may send them)
+                    my_email.NotificationWorker(SCHEDULER_ID).start()
                     log.info("Importing already scheduled executions…")
-                    scheduler_startup_execute_scheduled(pool)
+                    scheduler_startup_execute_scheduled(supervisor)
                     log.info("Done")
 
+                    if DISPATCH_MODE=='push':
+                        threading.Thread(target=pendingWatcher, name='pending-watcher', daemon=True).start()
+
                     log.info("Entering main loop to check for Pending executions")
                     # add new execution (Pending)
                     while stopFlag is not True:
-                        scheduler_schedule_pending(pool)
+                        scheduler_schedule_pending(supervisor)
                         # lazy update of persistent statistics, done in main thread thus thread safe
-                        monitor.persistStat()
+                        _monitor._persistStat()
                         # log.info("waiting..")
-                        time.sleep(LOOP_SLEEP_SEC)
+                        # sleep until the next periodic sweep, unless woken up by pendingWatcher
+                        wakeup.wait(LOOP_SLEEP_SEC)
+                        wakeup.clear()
 
                 except Exception as err:
                     log.exception("Error in workflow execution")
-                    stopPool(pool)
+                    stopSupervisor(supervisor)
                 except:
                     log.exception("Unknown error encountered?!")
-                    stopPool(pool)
+                    stopSupervisor(supervisor)
         except pidfile.AlreadyRunningError:
             log.error('Already running.')
     log.info("Exiting MupifDB Workflow Scheduler\n")
@@ -0,0 +1,135 @@
+'''
+Warm interpreter ("zygote") for running workflow execution scripts.
+
+Running ``python workflow_execution_script.py`` for every execution pays interpreter startup and imports of
+mupif, Pyro5, pydantic and mupifDB, which dominates for short workflows. The zygote is a single-threaded
+process with those modules already imported, listening on a UNIX socket; for each request it forks a handler,
+which forks the job itself (in its working directory, with its environment and output redirected to the log file),
+reports its PID, waits for it and sends the exit status back. Jobs are thus still isolated processes, but start warm. One zygote
+serves any number of concurrent jobs, as it only forks.
+
+Nothing which cannot survive fork (network connections, threads) is created in the zygote; the nameserver
+connection and Pyro daemon of the execution script are set up in the job process, as before.
+
+Run as ``python -m mupifDB.zygote SOCKET``, with the same environment as the execution scripts (modules
+read some configuration from the environment when imported); use :func:`runAsync` to execute a script.
+'''
+import sys
+import os
+import socket
+import json
+import signal
+import runpy
+import asyncio
+import traceback
+import logging
+from typing import Callable
+
+from mupifDB import execlimits
+
+log = logging.getLogger('zygote')
+
+PRELOAD = ['mupif', 'Pyro5.api', 'Pyro5.errors', 'pydantic', 'mupifDB', 'mupifDB.workflowmanager', 'mupifDB.restLogger']
+
+
+def _runJob(req: dict) -> None:
+    'Executed in the forked job process; never returns.'
+    code = 1
+    try:
+        os.setsid()
+        if req.get('limits'): execlimits.apply(0, execlimits.Allocation(**req['limits']))
+        os.chdir(req['cwd'])
+        os.environ.clear()
+        os.environ.update(req['env'])
+        fdNull = os.open(os.devnull, os.O_RDONLY)
+        fdLog = os.open(req['log'], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.dup2(fdNull, 0)
+        os.dup2(fdLog, 1)
+        os.dup2(fdLog, 2)
+        os.close(fdNull)
+        os.close(fdLog)
+        # what the interpreter would do for "python script args"
+        sys.argv = [req['script']] + req['args']
+        sys.path.insert(0, os.path.dirname(os.path.abspath(req['script'])))
+        runpy.run_path(req['script'], run_name='__main__')
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _handle(conn: socket.socket) -> None:
+    'Executed in the forked handler process; never returns.'
+    try:
+        with conn, conn.makefile('rw') as f:
+            req = json.loads(f.readline())
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                _runJob(req)
+            f.write(json.dumps({'pid': pid})+'\n')
+            f.flush()
+            _, status = os.waitpid(pid, 0)
+            f.write(json.dumps({'exit': os.waitstatus_to_exitcode(status)})+'\n')
+            f.flush()
+    finally:
+        os._exit(0)
+
+
+def serve(sockPath: str) -> None:
+    for mod in PRELOAD: __import__(mod)
+    # handlers are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    if os.path.exists(sockPath): os.unlink(sockPath)
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(sockPath)
+    os.chmod(sockPath, 0o600)
+    srv.listen(64)
+    log.info(f'Zygote listening at {sockPath}')
+    while True:
+        conn, _ = srv.accept()
+        if os.fork() == 0:
+            srv.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            _handle(conn)
+        conn.close()
+
+
+class Unavailable(OSError):
+    'The zygote could not be reached; nothing was started.'
+
+
+async def runAsync(sockPath: str, script: str, args: list[str], cwd: str, env: dict[str, str], logPath: str, limits: execlimits.Allocation | None = None, onStart: Callable[[int], None] | None = None) -> int:
+    '''
+    Run *script* with *args* in *cwd*, with environment *env*, appending its output to *logPath*, in a process
+    forked from the zygote listening at *sockPath*, under resource *limits*; *onStart* is called with its PID once
+    it is started. Return the exit code (negative signal number if killed, like :obj:`subprocess.call`).
+
+    Raise :obj:`Unavailable` if the zygote is not reachable (the script may be run otherwise), or another
+    :obj:`OSError` if the connection is lost after the request was sent (the script may have been started).
+    '''
+    try: reader, writer = await asyncio.open_unix_connection(sockPath)
+    except OSError as e: raise Unavailable(f'Zygote at {sockPath} not reachable: {e}') from e
+    try:
+        writer.write((json.dumps(dict(script=str(script), args=[str(a) for a in args], cwd=cwd, env=env, log=logPath, limits=(limits.model_dump() if limits else None)))+'\n').encode())
+        await writer.drain()
+        while True:
+            reply = await reader.readline()
+            if not reply: raise ConnectionError('Zygote closed the connection without reporting exit status.')
+            msg = json.loads(reply)
+            if 'exit' in msg: return msg['exit']
+            if onStart is not None: onStart(msg['pid'])
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig()
+    serve(sys.argv[1])
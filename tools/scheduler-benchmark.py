@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+'''
+Throughput benchmark of the workflow scheduler with synthetic workloads.
+
+Runs everything in a throwaway setup: mongod (temporary dbpath, single-node replica set so that change streams work),
+Pyro nameserver, the REST API (in-process under uvicorn, authentication bypassed) and workflowscheduler.main() in a
+thread. Jobmanagers are not contacted: resource probes are stubbed (unavailable with the given rate) and executions
+run a stub script sleeping for a random duration instead of the workflow.
+
+N pending executions are inserted at once; the benchmark waits until all of them are Finished and reports dispatch
+latency percentiles (Pending to Scheduled and to Finished), jobs per minute and REST calls per job (by route).
+
+Example:
+
+    PYTHONPATH=.. python3 tools/scheduler-benchmark.py --jobs 200 --duration 1 5 --unavailable .1 --poolsize 50
+'''
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import socket
+import collections
+import datetime
+import statistics
+import atexit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__))+'/..')
+
+parser = argparse.ArgumentParser(description='Scheduler throughput benchmark', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('--jobs', type=int, default=100, help='number of pending executions')
+parser.add_argument('--workflows', type=int, default=5, help='number of distinct workflows the executions are spread over')
+parser.add_argument('--duration', type=float, nargs=2, default=(0., 2.), metavar=('MIN', 'MAX'), help='workflow run time range [s]')
+parser.add_argument('--unavailable', type=float, default=0., help='probability that a resource probe reports unavailable resources')
+parser.add_argument('--poolsize', type=int, default=None, help='override workflowscheduler.poolsize')
+parser.add_argument('--loop-sleep', type=float, default=None, help='override workflowscheduler.LOOP_SLEEP_SEC')
+parser.add_argument('--backoff-base', type=float, default=2., help='override workflowscheduler.BACKOFF_BASE_SEC')
+parser.add_argument('--dispatch', choices=['push', 'poll'], default='push', help='workflowscheduler.DISPATCH_MODE')
+parser.add_argument('--timeout', type=float, default=600., help='give up after this many seconds')
+parser.add_argument('--mongod', default='/usr/bin/mongod', help='mongod executable')
+parser.add_argument('--seed', type=int, default=0)
+opts = parser.parse_args()
+
+
+def anyPort() -> int:
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    return s.getsockname()[1]
+
+def portOpen(port: int) -> bool:
+    try: socket.create_connection(('127.0.0.1', port), timeout=1).close()
+    except OSError: return False
+    return True
+
+def waitFor(cond, timeout, what):
+    t0 = time.time()
+    while not cond():
+        if time.time()-t0 > timeout: raise RuntimeError(f'Timeout waiting for {what}.')
+        time.sleep(.1)
+
+
+tmp = tempfile.mkdtemp(prefix='mupifDB-bench-')
+PORTS = dict(mongodb=anyPort(), nameserver=anyPort(), restApi=anyPort())
+procs: list[subprocess.Popen] = []
+atexit.register(lambda: [p.terminate() for p in procs])
+
+print(f'Starting mongod and nameserver (working directory {tmp})')
+os.mkdir(tmp+'/db')
+procs.append(subprocess.Popen([opts.mongod, '--port', str(PORTS['mongodb']), '--bind_ip', '127.0.0.1', '--noauth', '--replSet', 'rs0', '--dbpath', tmp+'/db', '--logpath', tmp+'/mongod.log'], stdout=subprocess.DEVNULL))
+procs.append(subprocess.Popen([sys.executable, '-m', 'Pyro5.nameserver', '--port', str(PORTS['nameserver'])], stdout=subprocess.DEVNULL))
+
+waitFor(lambda: portOpen(PORTS['nameserver']), 30, 'nameserver')
+waitFor(lambda: portOpen(PORTS['mongodb']), 30, 'mongod')
+import pymongo
+mc = pymongo.MongoClient(f'mongodb://127.0.0.1:{PORTS["mongodb"]}', directConnection=True)
+mc.admin.command('replSetInitiate', {'_id': 'rs0', 'members': [{'_id': 0, 'host': f'127.0.0.1:{PORTS["mongodb"]}'}]})
+waitFor(lambda: mc.admin.command('hello').get('isWritablePrimary'), 30, 'replica set primary')
+
+os.environ['MUPIFDB_MONGODB_PORT'] = str(PORTS['mongodb'])
+os.environ['MUPIFDB_REST_SERVER'] = f'http://127.0.0.1:{PORTS["restApi"]}'
+os.environ['MUPIF_NS'] = f'127.0.0.1:{PORTS["nameserver"]}'
+os.environ['MUPIFDB_SCHEDULER_DISPATCH'] = opts.dispatch
+os.environ['MUPIFDB_WORKFLOW_CACHE_MAX_MB'] = '0'
+
+# REST API in-process, with every request counted by route
+import uvicorn
+from mupifDB.api import main as api
+from mupifDB import models
+restCalls: collections.Counter = collections.Counter()
+
+@api.app.middleware('http')
+async def countRequests(request, call_next):
+    response = await call_next(request)
+    route = request.scope.get('route')
+    restCalls[f'{request.method} {route.path if route else request.url.path}'] += 1
+    return response
+
+benchUser = models.User_Model(mail='bench@localhost', name='Bench', surname='Mark', password='', rights_admin=True)
+api.app.dependency_overrides[api.get_current_authenticated_user] = lambda: benchUser
+server = uvicorn.Server(uvicorn.Config(api.app, host='127.0.0.1', port=PORTS['restApi'], log_level='warning'))
+threading.Thread(target=server.run, daemon=True).start()
+waitFor(lambda: server.started, 30, 'REST API')
+
+# scheduler with stubbed jobmanagers and workflows
+os.chdir(tmp)
+from mupifDB import workflowscheduler as ws
+rnd = random.Random(opts.seed)
+ws.schedulerStatFile = tmp+'/sched-stat.json'
+ws.BACKOFF_BASE_SEC = opts.backoff_base
+if opts.poolsize is not None: ws.poolsize = opts.poolsize
+if opts.loop_sleep is not None: ws.LOOP_SLEEP_SEC = opts.loop_sleep
+
+def probeModelsResources(models_md) -> bool:
+    return rnd.random() >= opts.unavailable
+ws.probeModelsResources = probeModelsResources
+
+def executeWorkflow_copyInputs(we_id, workflow_record, tempDir, execScript) -> None:
+    open(execScript, 'w').write(f'import time\ntime.sleep({rnd.uniform(*opts.duration)})\n')
+ws.executeWorkflow_copyInputs = executeWorkflow_copyInputs
+
+# synthetic workload
+db = api.db
+db.Settings.update_one({}, {'$setOnInsert': {'projectName': 'benchmark'}}, upsert=True)
+for i in range(opts.workflows):
+    wf = models.Workflow_Model(wid=f'bench-{i}', Description='benchmark', UseCase='bench', modulename='bench', classname='Bench',
+        IOCard=models.Workflow_Model.IOCard_Model(Inputs=[], Outputs=[]), Models=[models.Workflow_Model.Model_Model(Name=f'model-{i}', Jobmanager=f'jm-{i}')])
+    db.Workflows.insert_one(wf.model_dump_db())
+now = datetime.datetime.now()
+db.WorkflowExecutions.insert_many([
+    models.WorkflowExecution_Model(WorkflowID=f'bench-{j%opts.workflows}', WorkflowVersion=1, Status='Pending', CreatedDate=now, SubmittedDate=now,
+        RequestedBy=f'user{j%3}@localhost', UseCase='bench', Inputs='', Outputs='').model_dump_db()
+    for j in range(opts.jobs)
+])
+restCalls.clear()
+
+print(f'Running scheduler on {opts.jobs} pending executions')
+t0 = time.time()
+threading.Thread(target=ws.main, daemon=True).start()
+try:
+    def done():
+        n = db.WorkflowExecutions.count_documents({'Status': {'$in': ['Finished', 'Failed', 'Created']}})
+        print(f'\r{n}/{opts.jobs} done, {time.time()-t0:.0f}s', end='', flush=True)
+        return n == opts.jobs
+    waitFor(done, opts.timeout, 'executions to finish')
+    print()
+finally:
+    ws.stopFlag = True
+    ws.wakeup.set()
+
+# report
+def dt(a, b) -> float: return (datetime.datetime.fromisoformat(b)-datetime.datetime.fromisoformat(a)).total_seconds()
+recs = list(db.WorkflowExecutions.find({}, {'SubmittedDate': 1, 'ScheduledDate': 1, 'EndDate': 1, 'Status': 1, 'Attempts': 1}))
+finished = [r for r in recs if r['Status'] == 'Finished']
+def pct(vals: list[float]) -> str:
+    if len(vals) < 2: return 'n/a'
+    q = statistics.quantiles(vals, n=100)
+    return f'p50 {q[49]:.2f}s  p90 {q[89]:.2f}s  p99 {q[98]:.2f}s  max {max(vals):.2f}s'
+wall = max(dt(r['SubmittedDate'], r['EndDate']) for r in finished) if finished else float('nan')
+total = sum(restCalls.values())
+print(f'Finished {len(finished)}, failed {sum(r["Status"]=="Failed" for r in recs)}, gave up {sum(r["Status"]=="Created" for r in recs)}; '
+      f'attempts: mean {statistics.mean(r.get("Attempts", 0) for r in recs):.2f}')
+print(f'Pending -> Scheduled: {pct([dt(r["SubmittedDate"], r["ScheduledDate"]) for r in finished if r.get("ScheduledDate")])}')
+print(f'Pending -> Finished:  {pct([dt(r["SubmittedDate"], r["EndDate"]) for r in finished])}')
+print(f'Throughput: {60*len(finished)/wall:.1f} jobs/min (wall time {wall:.1f}s)')
+print(f'REST calls: {total} total, {total/max(1, len(recs)):.1f} per job')
+for route, n in restCalls.most_common(): print(f'  {n:8d}  {n/max(1, len(recs)):6.2f}/job  {route}')
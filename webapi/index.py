@@ -630,7 +630,7 @@ def executions():
     html += 'label: <input type="text" name="filter_label" value="' + filter_label + '" style="width:100px;"> '
     html += 'status: <select name="filter_status">'
     html += '<option value="">Any</option>'
-    status_list = ['Created', 'Pending', 'Scheduled', 'Running', 'Finished', 'Failed']
+    status_list = ['Created', 'Blocked', 'Pending', 'Scheduled', 'Running', 'Finished', 'Failed']
     for st in status_list:
         selected = ' selected' if filter_status == st else ''
         html += '<option value="' + st + '"' + selected + '>' + st + '</option>'
@@ -677,7 +677,7 @@ def executionStatus(weid):
     data = restApiControl.getExecutionRecord(weid)
     logID = data.ExecutionLog
     html = ''
-    if data.Status in ('Pending', 'Running', 'Scheduled'):
+    if data.Status in ('Blocked', 'Pending', 'Running', 'Scheduled'):
         html += '<script type="text/javascript">'
         html += 'window.execution_id = "' + weid + '";'
         html += 'window.exec_check_status_sum = 0;'
@@ -695,6 +695,10 @@ def executionStatus(weid):
     html += '<tr><td colspan="2" style="height:10px;"></td></tr>'
 
     html += '<tr><td>Status:</td><td>' + str(data.Status) + '</td></tr>'
+    if data.CachedFrom:
+        html += f'<tr><td>Outputs reused from:</td><td><a href="{BASE_URL}/workflowexecutions/{data.CachedFrom}">{data.CachedFrom}</a></td></tr>'
+    if data.Status == 'Blocked':
+        html += '<tr><td>Waiting for:</td><td>' + ' '.join(f'<a href="{BASE_URL}/workflowexecutions/{d}">{d}</a>' for d in data.DependsOn) + '</td></tr>'
     html += '<tr><td>Start Date:</td><td>' + str(data.StartDate).replace('None', '')[:19] + '</td></tr>'
     html += '<tr><td>End Date:</td><td>' + str(data.EndDate).replace('None', '')[:19] + '</td></tr>'
     html += '</table>'
@@ -716,6 +720,11 @@ def executionStatus(weid):
     if data.Status in ('Finished','Failed') and logID is not None:
         html += f'<li> <a href="{BASE_URL}/file/{str(logID)}"> Execution log</a></li>'
     html += '</ul>'
+    if data.Status == 'Running':
+        # log streamed so far by the scheduler; only the end of it
+        execLog, _ = restApiControl.getExecutionLog(weid)
+        html += 'Execution log (last part):<br>'
+        html += '<pre style="font-size:12px;max-height:400px;overflow:auto;">' + str(escape(execLog[-20000:])) + '</pre>'
 
     return my_render_template('basic.html', body=Markup(html), login=login_header_html())
 